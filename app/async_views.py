@@ -0,0 +1,92 @@
+import logging
+from http import HTTPStatus
+
+from django.db.models import Max
+from django.utils.translation import gettext as _
+
+from app.error_codes import ErrorCode
+from app.models import Post, PostView, Comment
+from app.serializers import PostModelSerializer, CommentModelSerializer
+from app.views import feed_queryset
+from core.async_views import AsyncAPIView, async_api_response
+from core.conditional import abump_version
+from core.functions import streaming_api_response
+from core.utils import RequestLoggingMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+###################################### POST ######################################
+class PostDetailAsyncView(AsyncAPIView):
+    """Async twin of `PostDetailAPIView`, rendered by the same serializer with the same ETag."""
+
+    async def aget_validator_parts(self, request, pk):
+        row = await Post.objects.visible().filter(pk=pk).values_list('updated_at', 'user__updated_at').afirst()
+        if row is None:
+            return None
+        updated_at, author_updated_at = row
+
+        # The view is recorded here so that it also counts when the client gets a 304.
+        _view, created = await PostView.objects.aget_or_create(post_id=pk, user_id=request.user.id)
+        if created:
+            await abump_version('post', pk)
+        return ('post', pk, updated_at, author_updated_at), 'post', pk
+
+    async def get(self, request, pk):
+        ip = RequestLoggingMiddleware.get_client_ip(request)
+        queryset = PostModelSerializer.prepare_queryset(Post.objects.visible(), request)
+        post = await queryset.filter(pk=pk).afirst()
+        if post is None:
+            return async_api_response(
+                success=False,
+                error_code=ErrorCode.POST_NOT_FOUND,
+                message=_("Post not found"),
+                status=HTTPStatus.NOT_FOUND
+            )
+        logger.debug("Post detail viewed | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
+
+        # The prepared queryset carries the joins and counters, so rendering runs no queries.
+        data = PostModelSerializer(post, context={'request': request}).data
+        data['views'] = await PostView.objects.filter(post_id=pk).acount()
+        return async_api_response(
+            success=True,
+            message=_("Post retrieved successfully"),
+            data=data
+        )
+
+
+class PostFeedAsyncView(AsyncAPIView):
+    """Async twin of `PostFeedAPIView`: same queryset, `since` cursor and streamed envelope."""
+
+    async def get(self, request):
+        ip = RequestLoggingMiddleware.get_client_ip(request)
+        logger.debug("Post feed accessed | user_id=%s | ip=%s", request.user.id, ip)
+        return streaming_api_response(
+            message=_("Feed retrieved successfully"),
+            queryset=feed_queryset(request),
+            serializer=PostModelSerializer(context={'request': request})
+        )
+
+
+###################################### COMMENT ######################################
+class PostCommentsAsyncView(AsyncAPIView):
+    """Async twin of `PostCommentsListAPIView`."""
+
+    async def aget_validator_parts(self, request, post_id):
+        if not await Post.objects.visible().filter(pk=post_id).aexists():
+            return None
+        # Covers username and avatar edits of any comment author on the post.
+        authors_updated_at = (await Comment.objects.filter(post_id=post_id).aaggregate(
+            latest=Max('user__updated_at')))['latest']
+        return ('comments', post_id, authors_updated_at, request.get_full_path()), 'post', post_id
+
+    async def get(self, request, post_id):
+        ip = RequestLoggingMiddleware.get_client_ip(request)
+        logger.debug("Post comments list accessed | user_id=%s | post_id=%s | ip=%s", request.user.id, post_id, ip)
+
+        comments = Comment.objects.filter(post_id=post_id, post__deleted_at__isnull=True).order_by('-created_at')
+        return streaming_api_response(
+            message=_("Comments retrieved successfully"),
+            queryset=CommentModelSerializer.prepare_queryset(comments, request),
+            serializer=CommentModelSerializer(context={'request': request})
+        )
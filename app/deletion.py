@@ -0,0 +1,60 @@
+import logging
+
+from django.db import connection
+from django.utils import timezone
+
+from app.models import Post, Like, Comment, PostView
+from core.conditional import bump_version
+from root.settings import POST_DELETE_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+CHILDREN = (Like, Comment, PostView)
+
+
+def tombstone_post(post_id):
+    """Hide the post from every read right away. Returns False when it was already deleted."""
+    tombstoned = Post.objects.visible().filter(pk=post_id).update(deleted_at=timezone.now())
+    if tombstoned:
+        bump_version('post', post_id)
+    return bool(tombstoned)
+
+
+def stale_tombstones(older_than, limit):
+    """Tombstones whose cleanup should have finished by now, e.g. because a worker died mid-way."""
+    cutoff = timezone.now() - older_than
+    return list(Post.objects.filter(deleted_at__lt=cutoff).order_by('deleted_at').values_list('id', flat=True)[:limit])
+
+
+def delete_rows(model, ids):
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{model._meta.db_table}" WHERE "id" IN ({placeholders})', ids)
+
+
+def delete_children(model, post_id, chunk_size):
+    deleted = 0
+    children = model.objects.filter(post_id=post_id).order_by('id').values_list('id', flat=True)
+    while ids := list(children[:chunk_size]):
+        delete_rows(model, ids)
+        deleted += len(ids)
+    return deleted
+
+
+def purge_post(post_id, chunk_size=POST_DELETE_CHUNK_SIZE):
+    """
+    Remove a tombstoned post in bounded primary-key chunks, children first, without loading
+    any rows into Python. Safe to re-run after an interruption. Returns the image name for
+    media cleanup, or None when there is nothing (left) to purge.
+    """
+    image = Post.objects.filter(pk=post_id, deleted_at__isnull=False).values_list('image', flat=True).first()
+    if image is None:
+        return None
+
+    for model in CHILDREN:
+        deleted = delete_children(model, post_id, chunk_size)
+        logger.info("Post purge step done | post_id=%s | model=%s | rows=%s", post_id, model.__name__, deleted)
+
+    delete_rows(Post, [post_id])
+    logger.warning("Post purged | post_id=%s", post_id)
+    return image
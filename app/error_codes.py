@@ -1,5 +1,6 @@
 class ErrorCode:
     UNKNOWN = "ERR_000"
+    # No longer returned since like/unlike became idempotent; kept reserved so older clients keep parsing.
     POST_ALREADY_LIKED = "ERR_101"
     POST_NOT_LIKED = "ERR_102"
     POST_NOT_FOUND = "ERR_103"
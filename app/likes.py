@@ -0,0 +1,56 @@
+from django.db import connection, transaction, IntegrityError
+from django.utils import timezone
+
+from app.models import Post, Like
+
+POST_TABLE = Post._meta.db_table
+LIKE_TABLE = Like._meta.db_table
+# Tombstoned posts are treated as missing.
+VISIBLE_POST = f'SELECT 1 FROM "{POST_TABLE}" WHERE "id" = %s AND "deleted_at" IS NULL'
+
+
+def count_likes(cursor, post_id):
+    cursor.execute(f'SELECT COUNT(*) FROM "{LIKE_TABLE}" WHERE "post_id" = %s', [post_id])
+    return cursor.fetchone()[0]
+
+
+def post_exists(cursor, post_id):
+    cursor.execute(VISIBLE_POST, [post_id])
+    return cursor.fetchone() is not None
+
+
+def like_post(user_id, post_id):
+    """
+    Idempotent like. The insert only happens when the post exists and conflicts on the
+    (post, user) unique constraint are swallowed, so there is no read-then-write race.
+    Returns `(created, likes_count)`, or None when the post does not exist.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{LIKE_TABLE}" ("post_id", "user_id", "created_at") '
+                f'SELECT %s, %s, %s WHERE EXISTS ({VISIBLE_POST}) '
+                f'ON CONFLICT ("post_id", "user_id") DO NOTHING RETURNING "id"',
+                [post_id, user_id, now, post_id]
+            )
+            created = cursor.fetchone() is not None
+            if not created and not post_exists(cursor, post_id):
+                return None
+            return created, count_likes(cursor, post_id)
+    except IntegrityError:
+        # The post was deleted between the existence check and the deferred FK check.
+        return None
+
+
+def unlike_post(user_id, post_id):
+    """Idempotent unlike. Returns `(deleted, likes_count)`, or None when the post does not exist."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM "{LIKE_TABLE}" WHERE "post_id" = %s AND "user_id" = %s RETURNING "id"',
+            [post_id, user_id]
+        )
+        deleted = cursor.fetchone() is not None
+        if not deleted and not post_exists(cursor, post_id):
+            return None
+        return deleted, count_likes(cursor, post_id)
@@ -1,4 +1,6 @@
-from django.db.models import Model, ForeignKey, CASCADE, TextField, DateTimeField, ImageField, BooleanField
+from django.db.models import Model, ForeignKey, CASCADE, TextField, DateTimeField, ImageField, BooleanField, Index, \
+    QuerySet, Count, Exists, OuterRef, Subquery, Value, IntegerField, Q
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 from core.storage import SupabaseStorage
@@ -6,6 +8,32 @@ from core.storage import SupabaseStorage
 supabase_storage = SupabaseStorage()
 
 
+class PostQuerySet(QuerySet):
+    def visible(self):
+        """Posts that have not been tombstoned by a delete still waiting for its background cleanup."""
+        return self.filter(deleted_at__isnull=True)
+
+    def active(self):
+        """Visible posts whose author has not deleted their account."""
+        return self.visible().filter(user__is_deleted=False)
+
+    def with_stats(self, viewer_id=None):
+        """
+        Annotate `likes_total`, `comments_total` and `viewer_liked` as correlated subqueries,
+        so counters for a whole page come back with the posts in a single query.
+        """
+        return self.annotate(
+            likes_total=count_subquery(Like.objects, 'post'),
+            comments_total=count_subquery(Comment.objects, 'post'),
+            viewer_liked=Exists(Like.objects.filter(post=OuterRef('pk'), user_id=viewer_id)),
+        )
+
+
+def count_subquery(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('*'))
+    return Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), Value(0))
+
+
 class Post(Model):
     user = ForeignKey(
         'authentication.User',
@@ -18,9 +46,19 @@ class Post(Model):
     created_at = DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
     updated_at = DateTimeField(auto_now=True, verbose_name=_('Updated at'))
     is_edited = BooleanField(default=False, verbose_name=_('Is edited'))
+    deleted_at = DateTimeField(null=True, blank=True, verbose_name=_('Deleted at'))
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created_at',)
+        indexes = [
+            Index(fields=['user', '-created_at'], name='post_user_created_idx'),
+            # Backs the feed `since` filter and the unseen count, which range over ids per author.
+            # Carries deleted_at so the tombstone check is answered from the index alone.
+            Index(fields=['user', 'id', 'deleted_at'], name='post_user_id_idx'),
+            Index(fields=['deleted_at'], condition=Q(deleted_at__isnull=False), name='post_tombstone_idx'),
+        ]
         verbose_name = _('Post')
         verbose_name_plural = _('Posts')
 
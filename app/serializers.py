@@ -1,18 +1,21 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import SerializerMethodField
-from rest_framework.serializers import ModelSerializer
+from rest_framework.fields import SerializerMethodField, ListField, IntegerField, BooleanField
+from rest_framework.serializers import ModelSerializer, Serializer
 
 from app.models import Post, PostView, Like, Comment
 from authentication.serializers import UserProfileSecondSerializer
+from core.mixins import SparseFieldsetMixin
+from root.settings import BULK_LOOKUP_MAX
 
 
-class CommentModelSerializer(ModelSerializer):
+class CommentModelSerializer(SparseFieldsetMixin, ModelSerializer):
     user = UserProfileSecondSerializer(read_only=True)
 
     class Meta:
         model = Comment
         fields = ('id', 'post', 'user', 'text', 'created_at')
+        expandable_fields = ('user',)
         read_only_fields = ('id', 'created_at', 'user', 'post')
 
     def validate_text(self, value):
@@ -23,7 +26,7 @@ class CommentModelSerializer(ModelSerializer):
         return value
 
 
-class PostModelSerializer(ModelSerializer):
+class PostModelSerializer(SparseFieldsetMixin, ModelSerializer):
     user = UserProfileSecondSerializer(read_only=True)
     likes_count = SerializerMethodField()
     comments_count = SerializerMethodField()
@@ -34,15 +37,30 @@ class PostModelSerializer(ModelSerializer):
         fields = (
             'id', 'caption', 'user', 'likes_count', 'comments_count', 'is_liked', 'image', 'created_at',
             'updated_at')
+        expandable_fields = ('user',)
         read_only_fields = ('id', 'user', 'created_at', 'updated_at', 'is_edited')
 
+    @classmethod
+    def prepare_queryset(cls, queryset, request):
+        queryset = super().prepare_queryset(queryset, request)
+        if any(cls.wants(request, name) for name in ('likes_count', 'comments_count', 'is_liked')):
+            queryset = queryset.with_stats(request.user.id)
+        return queryset
+
+    # Querysets built with `PostQuerySet.with_stats` carry these values already.
     def get_likes_count(self, obj):
+        if hasattr(obj, 'likes_total'):
+            return obj.likes_total
         return obj.likes.count()
 
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comments_total'):
+            return obj.comments_total
         return obj.comments.count()
 
     def get_is_liked(self, obj):
+        if hasattr(obj, 'viewer_liked'):
+            return obj.viewer_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Like.objects.filter(user=request.user, post=obj).exists()
@@ -58,13 +76,14 @@ class PostModelSerializer(ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class PostCreateModelSerializer(ModelSerializer):
+class PostCreateModelSerializer(SparseFieldsetMixin, ModelSerializer):
     user = UserProfileSecondSerializer(read_only=True)
     image_url = SerializerMethodField()
 
     class Meta:
         model = Post
         fields = ('id', 'caption', 'user', 'created_at', 'updated_at', 'is_edited', 'image', 'image_url')
+        expandable_fields = ('user',)
         read_only_fields = ('id', 'created_at', 'updated_at', 'is_edited')
         extra_kwargs = {
             'image': {'write_only': True},
@@ -94,17 +113,30 @@ class PostCreateModelSerializer(ModelSerializer):
         return None
 
 
-class PostViewModelSerializer(ModelSerializer):
+class PostViewModelSerializer(SparseFieldsetMixin, ModelSerializer):
     class Meta:
         model = PostView
         fields = '__all__'
         read_only_fields = ('id', 'user', 'post')
 
 
-class LikeModelSerializer(ModelSerializer):
+class LikeModelSerializer(SparseFieldsetMixin, ModelSerializer):
     user = UserProfileSecondSerializer(read_only=True)
 
     class Meta:
         model = Like
         fields = ('id', 'post', 'user', 'created_at')
+        expandable_fields = ('user',)
         read_only_fields = ('id', 'created_at', 'user', 'post')
+
+
+class PostIdsSerializer(Serializer):
+    ids = ListField(child=IntegerField(), allow_empty=False, max_length=BULK_LOOKUP_MAX)
+
+
+class PostBatchSerializer(PostIdsSerializer):
+    record_views = BooleanField(default=True)
+
+
+class FeedSinceSerializer(Serializer):
+    since = IntegerField(min_value=0)
@@ -0,0 +1,48 @@
+import logging
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import IntegrityError
+from kombu.exceptions import OperationalError
+
+from app.deletion import purge_post, stale_tombstones
+from app.models import supabase_storage
+
+logger = logging.getLogger(__name__)
+
+
+# Removing a missing object is a no-op, so any storage or transport error is safe to retry.
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def delete_media(names):
+    for name in names:
+        if name:
+            supabase_storage.delete(name)
+    logger.info("Media deleted | count=%s", len(names))
+
+
+@shared_task(autoretry_for=(IntegrityError,), retry_backoff=True, max_retries=5)
+def purge_deleted_post(post_id):
+    # A like or comment that raced the tombstone fails the final delete; the retry sweeps it up.
+    image = purge_post(post_id)
+    if image is None:
+        return False
+    delete_media.delay([image])
+    return True
+
+
+def queue_post_purge(post_id):
+    try:
+        purge_deleted_post.delay(post_id)
+    except OperationalError:
+        # The post is already tombstoned; the stale tombstone sweep will queue it once the broker is back.
+        logger.warning("Post purge not queued, broker unavailable | post_id=%s", post_id)
+
+
+@shared_task
+def purge_stale_tombstones(batch=100):
+    """Re-queue post cleanups that never finished."""
+    post_ids = stale_tombstones(timedelta(hours=1), batch)
+    for post_id in post_ids:
+        purge_deleted_post.delay(post_id)
+    return len(post_ids)
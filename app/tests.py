@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from app.deletion import tombstone_post, purge_post
+from app.likes import like_post, unlike_post
+from app.models import Post, Like, Comment, PostView
+from app.tasks import purge_deleted_post
+from authentication.models import User
+
+
+@mock.patch('app.deletion.bump_version')
+class PostPurgeTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author', email='author@example.com')
+        self.post = Post.objects.create(user=self.author, image='posts/1.jpg')
+        for i in range(5):
+            user = User.objects.create(username=f'user{i}', email=f'user{i}@example.com')
+            Like.objects.create(post=self.post, user=user)
+            Comment.objects.create(post=self.post, user=user, text='hi')
+            PostView.objects.create(post=self.post, user=user)
+
+    def test_tombstone_hides_post_once(self, bump_version):
+        self.assertTrue(tombstone_post(self.post.id))
+        self.assertFalse(tombstone_post(self.post.id))
+        self.assertFalse(Post.objects.visible().filter(pk=self.post.id).exists())
+        bump_version.assert_called_once_with('post', self.post.id)
+
+    def test_purge_deletes_children_in_chunks(self, bump_version):
+        tombstone_post(self.post.id)
+
+        self.assertEqual(purge_post(self.post.id, chunk_size=2), 'posts/1.jpg')
+
+        self.assertFalse(Post.objects.filter(pk=self.post.id).exists())
+        for model in (Like, Comment, PostView):
+            self.assertFalse(model.objects.filter(post_id=self.post.id).exists())
+        self.assertIsNone(purge_post(self.post.id, chunk_size=2))
+
+    def test_purge_skips_visible_post(self, bump_version):
+        self.assertIsNone(purge_post(self.post.id, chunk_size=2))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 5)
+
+    @mock.patch('app.tasks.delete_media')
+    def test_task_queues_media_cleanup(self, delete_media, bump_version):
+        tombstone_post(self.post.id)
+
+        self.assertTrue(purge_deleted_post.run(self.post.id))
+        delete_media.delay.assert_called_once_with(['posts/1.jpg'])
+
+    @mock.patch('app.tasks.delete_media')
+    @mock.patch('app.tasks.purge_post', side_effect=IntegrityError)
+    def test_task_retries_on_integrity_error(self, purge_post_mock, delete_media, bump_version):
+        tombstone_post(self.post.id)
+
+        with mock.patch.object(purge_deleted_post, 'retry', side_effect=RuntimeError('retry')) as retry:
+            with self.assertRaises(RuntimeError):
+                purge_deleted_post.apply(args=(self.post.id,), throw=True)
+
+        retry.assert_called_once()
+        delete_media.delay.assert_not_called()
+
+
+class LikeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='liker', email='liker@example.com')
+        self.post = Post.objects.create(user=self.user, image='posts/1.jpg')
+
+    def test_like_is_idempotent(self):
+        self.assertEqual(like_post(self.user.id, self.post.id), (True, 1))
+        self.assertEqual(like_post(self.user.id, self.post.id), (False, 1))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+    def test_unlike_is_idempotent(self):
+        like_post(self.user.id, self.post.id)
+
+        self.assertEqual(unlike_post(self.user.id, self.post.id), (True, 0))
+        self.assertEqual(unlike_post(self.user.id, self.post.id), (False, 0))
+
+    def test_missing_post(self):
+        self.assertIsNone(like_post(self.user.id, self.post.id + 1))
+        self.assertIsNone(unlike_post(self.user.id, self.post.id + 1))
+
+    @mock.patch('app.deletion.bump_version')
+    def test_tombstoned_post(self, bump_version):
+        tombstone_post(self.post.id)
+
+        self.assertIsNone(like_post(self.user.id, self.post.id))
+        self.assertIsNone(unlike_post(self.user.id, self.post.id))
+        self.assertFalse(Like.objects.exists())
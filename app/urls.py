@@ -1,11 +1,13 @@
 from django.urls import path
 
+from app.async_views import PostFeedAsyncView, PostDetailAsyncView, PostCommentsAsyncView
 from app.views import (
     PostCreateAPIView, PostListAPIView, CommentCreateAPIView,
     PostUpdateAPIView, PostDetailAPIView, PostFeedAPIView,
     PostDeleteAPIView, PostLikeAPIView, PostUnlikeAPIView,
     PostLikesListAPIView, CommentDeleteAPIView, PostCommentsListAPIView,
-    TopPostsAPIView, MyPostsAPIView
+    TopPostsAPIView, MyPostsAPIView, PostLikeStatusAPIView, PostBatchAPIView,
+    FeedUnseenCountAPIView
 )
 
 urlpatterns = [
@@ -17,8 +19,11 @@ urlpatterns = [
     path('posts/<int:pk>/like/', PostLikeAPIView.as_view()),
     path('posts/<int:pk>/unlike/', PostUnlikeAPIView.as_view()),
     path('posts/<int:pk>/likes/', PostLikesListAPIView.as_view()),
+    path('posts/likes/status', PostLikeStatusAPIView.as_view()),
+    path('posts/batch', PostBatchAPIView.as_view()),
     path('home/', PostFeedAPIView.as_view()),
     path('home/feed', TopPostsAPIView.as_view()),
+    path('home/unseen', FeedUnseenCountAPIView.as_view()),
     path('posts/me/', MyPostsAPIView.as_view()),
 ]
 
@@ -27,3 +32,9 @@ urlpatterns += [
     path('comments/<int:pk>/delete', CommentDeleteAPIView.as_view()),
     path('posts/<int:post_id>/comments', PostCommentsListAPIView.as_view()),
 ]
+
+urlpatterns += [
+    path('async/home/', PostFeedAsyncView.as_view()),
+    path('async/posts/<int:pk>/detail', PostDetailAsyncView.as_view()),
+    path('async/posts/<int:post_id>/comments', PostCommentsAsyncView.as_view()),
+]
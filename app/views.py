@@ -2,25 +2,34 @@ import logging
 from datetime import timedelta
 
 from celery.utils.time import timezone
-from django.db.models import Count, Q, F
+from django.db import transaction
+from django.db.models import Count, Q, F, Max
+from django.http import Http404
 from django.utils import timezone
 from django.utils.translation import gettext as _
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.generics import CreateAPIView, ListAPIView, DestroyAPIView, RetrieveAPIView, UpdateAPIView, \
-    get_object_or_404
+    GenericAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
+from app.deletion import tombstone_post
 from app.error_codes import ErrorCode
+from app.likes import like_post, unlike_post
 from app.models import Post, PostView, Comment, Like
 from app.permissions import IsOwnerOrReadOnly, IsOwnerOrAdmin
-from app.serializers import PostModelSerializer, CommentModelSerializer, LikeModelSerializer
-from authentication.models import Follow
+from app.serializers import PostModelSerializer, CommentModelSerializer, LikeModelSerializer, PostIdsSerializer, \
+    PostBatchSerializer, FeedSinceSerializer
+from app.tasks import queue_post_purge
+from authentication.models import followed_by
 from authentication.permissions import IsActiveUser
-from core.functions import api_response
+from core.conditional import ConditionalGetMixin, bump_version
+from core.functions import api_response, streaming_api_response
 from core.mixins import LanguageMixin
 from core.utils import RequestLoggingMiddleware
+from root.settings import FEED_UNSEEN_CAP
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +42,7 @@ class PostCreateAPIView(LanguageMixin, CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        bump_version('user', self.request.user.id)
 
     def create(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -49,24 +59,26 @@ class PostCreateAPIView(LanguageMixin, CreateAPIView):
 
 @extend_schema(tags=['post'])
 class PostListAPIView(LanguageMixin, ListAPIView):
-    queryset = Post.objects.all().order_by('-created_at')
     serializer_class = PostModelSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
+    def get_queryset(self):
+        queryset = Post.objects.active().order_by('-created_at')
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
+
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         logger.debug("Post list accessed | user_id=%s | ip=%s", request.user.id, ip)
-        response = super().list(request, *args, **kwargs)
-        return api_response(
-            success=True,
+        return streaming_api_response(
             message=_("Posts retrieved successfully"),
-            data=response.data
+            queryset=self.filter_queryset(self.get_queryset()),
+            serializer=self.get_serializer()
         )
 
 
 @extend_schema(tags=['post'])
 class PostDeleteAPIView(LanguageMixin, DestroyAPIView):
-    queryset = Post.objects.all()
+    queryset = Post.objects.visible()
     serializer_class = PostModelSerializer
     permission_classes = [IsOwnerOrReadOnly, IsActiveUser]
     lookup_field = 'pk'
@@ -75,14 +87,7 @@ class PostDeleteAPIView(LanguageMixin, DestroyAPIView):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         try:
             post = self.get_object()
-            super().destroy(request, *args, **kwargs)
-            logger.warning("Post deleted | user_id=%s | post_id=%s | ip=%s", request.user.id, post.id, ip)
-            return api_response(
-                success=True,
-                message=_("Post deleted successfully"),
-                data=None
-            )
-        except Exception:
+        except (Http404, PermissionDenied):
             logger.error("Post delete failed | user_id=%s | pk=%s | ip=%s", request.user.id, kwargs.get('pk'), ip)
             return api_response(
                 success=False,
@@ -91,10 +96,21 @@ class PostDeleteAPIView(LanguageMixin, DestroyAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # The post disappears from reads now; its likes, comments, views and image go in the background.
+        if tombstone_post(post.id):
+            transaction.on_commit(lambda: queue_post_purge(post.id))
+        bump_version('user', post.user_id)
+        logger.warning("Post deleted | user_id=%s | post_id=%s | ip=%s", request.user.id, post.id, ip)
+        return api_response(
+            success=True,
+            message=_("Post deleted successfully"),
+            data=None
+        )
+
 
 @extend_schema(tags=['post'])
 class PostUpdateAPIView(LanguageMixin, UpdateAPIView):
-    queryset = Post.objects.all()
+    queryset = Post.objects.visible()
     serializer_class = PostModelSerializer
     permission_classes = [IsOwnerOrReadOnly, IsActiveUser]
     lookup_field = 'pk'
@@ -113,20 +129,32 @@ class PostUpdateAPIView(LanguageMixin, UpdateAPIView):
 
 
 @extend_schema(tags=['post'])
-class PostDetailAPIView(LanguageMixin, RetrieveAPIView):
-    queryset = Post.objects.all()
+class PostDetailAPIView(LanguageMixin, ConditionalGetMixin, RetrieveAPIView):
     serializer_class = PostModelSerializer
     lookup_field = 'pk'
     permission_classes = [IsAuthenticated, IsActiveUser]
 
+    def get_queryset(self):
+        return self.get_serializer_class().prepare_queryset(Post.objects.visible(), self.request)
+
+    def get_validator_parts(self, request, *args, **kwargs):
+        # The nested author is part of the representation, so their profile edits change the ETag too.
+        row = Post.objects.visible().filter(pk=kwargs['pk']).values_list('updated_at', 'user__updated_at').first()
+        if row is None:
+            return None
+        updated_at, author_updated_at = row
+
+        # The view is recorded here so that it also counts when the client gets a 304.
+        _view, created = PostView.objects.get_or_create(post_id=kwargs['pk'], user=request.user)
+        if created:
+            bump_version('post', kwargs['pk'])
+        return ('post', kwargs['pk'], updated_at, author_updated_at), 'post', kwargs['pk']
+
     def retrieve(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         instance = self.get_object()
         logger.debug("Post detail viewed | user_id=%s | post_id=%s | ip=%s", request.user.id, instance.id, ip)
 
-        if request.user.is_authenticated:
-            PostView.objects.get_or_create(post=instance, user=request.user)
-
         serializer = self.get_serializer(instance)
         data = serializer.data
         data['views'] = instance.views.count()
@@ -137,26 +165,120 @@ class PostDetailAPIView(LanguageMixin, RetrieveAPIView):
         )
 
 
-@extend_schema(tags=['post-feed'])
+@extend_schema(tags=['post'])
+class PostBatchAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = PostBatchSerializer
+    permission_classes = [IsAuthenticated, IsActiveUser]
+
+    def record_views(self, user, post_ids):
+        seen = set(PostView.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+        unseen = [post_id for post_id in post_ids if post_id not in seen]
+        if unseen:
+            PostView.objects.bulk_create(
+                [PostView(post_id=post_id, user=user) for post_id in unseen],
+                ignore_conflicts=True
+            )
+            bump_version('post', *unseen)
+
+    def post(self, request):
+        ip = RequestLoggingMiddleware.get_client_ip(request)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        logger.debug("Post batch viewed | user_id=%s | count=%s | ip=%s", request.user.id, len(ids), ip)
+
+        posts = PostModelSerializer.prepare_queryset(Post.objects.active().filter(pk__in=ids), request)
+        posts = {post.id: post for post in posts}
+
+        if posts and serializer.validated_data['record_views']:
+            self.record_views(request.user, list(posts))
+        views = dict(
+            PostView.objects.filter(post_id__in=posts).values('post_id')
+            .annotate(total=Count('*')).values_list('post_id', 'total')
+        )
+
+        post_serializer = PostModelSerializer(context=self.get_serializer_context())
+        data = []
+        for post_id in ids:
+            post = posts.get(post_id)
+            if post is None:
+                data.append({'id': post_id, 'error_code': ErrorCode.POST_NOT_FOUND})
+                continue
+            item = post_serializer.to_representation(post)
+            item['views'] = views.get(post_id, 0)
+            data.append(item)
+
+        return api_response(
+            success=True,
+            message=_("Posts retrieved successfully"),
+            data=data
+        )
+
+
+def feed_since(request):
+    """The `since` post id a client sent as its feed head, validated, or None."""
+    # `GET` rather than `query_params`, so plain Django requests from the async views work too.
+    if 'since' not in request.GET:
+        return None
+    serializer = FeedSinceSerializer(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data['since']
+
+
+def feed_queryset(request):
+    """The viewer's own and followed authors' posts, newest first, shaped for `PostModelSerializer`."""
+    user = request.user
+    queryset = Post.objects.active().filter(
+        Q(user_id=user.id) | Q(user_id__in=followed_by(user.id))
+    ).order_by("-created_at")
+
+    # Post ids grow with creation time, so "newer than the head" is a primary key range.
+    since = feed_since(request)
+    if since is not None:
+        queryset = queryset.filter(id__gt=since)
+    return PostModelSerializer.prepare_queryset(queryset, request)
+
+
+@extend_schema(tags=['post-feed'], parameters=[
+    OpenApiParameter('since', int, description="Newest post id the client has; only newer posts are returned"),
+])
 class PostFeedAPIView(LanguageMixin, ListAPIView):
     serializer_class = PostModelSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
     def get_queryset(self):
-        user = self.request.user
-        following_ids = Follow.objects.filter(follower=user).values_list("following_id", flat=True)
-        return Post.objects.filter(
-            Q(user=user) | Q(user_id__in=following_ids)
-        ).order_by("-created_at")
+        return feed_queryset(self.request)
 
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         logger.debug("Post feed accessed | user_id=%s | ip=%s", request.user.id, ip)
-        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return streaming_api_response(
+            message=_("Feed retrieved successfully"),
+            queryset=self.get_queryset(),
+            serializer=self.get_serializer()
+        )
+
+
+@extend_schema(tags=['post-feed'], parameters=[FeedSinceSerializer])
+class FeedUnseenCountAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = FeedSinceSerializer
+    permission_classes = [IsAuthenticated, IsActiveUser]
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        # Capped count over the followed authors' id range; no rows are fetched or serialized.
+        # Deleted authors are dropped inside the follow subquery, so posts need no user join.
+        count = Post.objects.visible().filter(
+            user_id__in=followed_by(request.user.id, active_only=True),
+            id__gt=serializer.validated_data['since']
+        ).order_by()[:FEED_UNSEEN_CAP].count()
+
         return api_response(
             success=True,
-            message=_("Feed retrieved successfully"),
-            data=serializer.data
+            message=_("Unseen posts counted successfully"),
+            data={'count': count, 'has_more': count >= FEED_UNSEEN_CAP}
         )
 
 
@@ -167,13 +289,14 @@ class TopPostsAPIView(LanguageMixin, ListAPIView):
 
     def get_queryset(self):
         time_threshold = timezone.now() - timedelta(days=7)
-        return Post.objects.filter(
+        queryset = Post.objects.active().filter(
             created_at__gte=time_threshold
         ).annotate(
             likes_count_db=Count("likes", distinct=True),
             comments_count_db=Count("comments", distinct=True),
             engagement_score=F("likes_count_db") + F("comments_count_db")
         ).order_by("-engagement_score", "-created_at")
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
 
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -192,18 +315,18 @@ class MyPostsAPIView(LanguageMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsActiveUser]
 
     def get_queryset(self):
-        return Post.objects.filter(
+        queryset = Post.objects.visible().filter(
             user=self.request.user
         ).order_by("-created_at")
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
 
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         logger.debug("My posts accessed | user_id=%s | ip=%s", request.user.id, ip)
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return api_response(
-            success=True,
+        return streaming_api_response(
             message=_("My posts retrieved successfully"),
-            data=serializer.data
+            queryset=self.get_queryset(),
+            serializer=self.get_serializer()
         )
 
 
@@ -211,62 +334,65 @@ class MyPostsAPIView(LanguageMixin, ListAPIView):
 @extend_schema(tags=['like'])
 class PostLikeAPIView(LanguageMixin, APIView):
     permission_classes = [IsActiveUser]
+    throttle_scope = 'likes'
 
     def post(self, request, pk):
         ip = RequestLoggingMiddleware.get_client_ip(request)
-        post = get_object_or_404(Post, pk=pk)
         logger.info("Post like attempt | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
 
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            post=post
-        )
-
-        if not created:
-            logger.warning("Post already liked | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
+        result = like_post(request.user.id, pk)
+        if result is None:
+            logger.warning("Post like failed: post not found | user_id=%s | post_id=%s | ip=%s",
+                           request.user.id, pk, ip)
             return api_response(
                 success=False,
-                error_code=ErrorCode.POST_ALREADY_LIKED,
-                message=_("You have already liked this post"),
-                status=status.HTTP_400_BAD_REQUEST
+                error_code=ErrorCode.POST_NOT_FOUND,
+                message=_("Post not found"),
+                status=status.HTTP_404_NOT_FOUND
             )
 
-        logger.info("Post liked successfully | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
+        created, likes_count = result
+        if created:
+            bump_version('post', pk)
+            logger.info("Post liked successfully | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
         return api_response(
             success=True,
             message=_("Post liked successfully"),
-            data=None,
-            status=status.HTTP_201_CREATED
+            data={'is_liked': True, 'likes_count': likes_count},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
 
 @extend_schema(tags=['like'])
 class PostUnlikeAPIView(LanguageMixin, APIView):
     permission_classes = [IsActiveUser]
+    throttle_scope = 'likes'
 
     def post(self, request, pk):
         ip = RequestLoggingMiddleware.get_client_ip(request)
-        post = get_object_or_404(Post, pk=pk)
         logger.info("Post unlike attempt | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
 
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
-            logger.info("Post unliked successfully | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
-            return api_response(
-                success=True,
-                message=_("Post unliked successfully"),
-                data=None
-            )
-        except Like.DoesNotExist:
-            logger.warning("Post not liked | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
+        result = unlike_post(request.user.id, pk)
+        if result is None:
+            logger.warning("Post unlike failed: post not found | user_id=%s | post_id=%s | ip=%s",
+                           request.user.id, pk, ip)
             return api_response(
                 success=False,
-                error_code=ErrorCode.POST_NOT_LIKED,
-                message=_("You have not liked this post"),
-                status=status.HTTP_400_BAD_REQUEST
+                error_code=ErrorCode.POST_NOT_FOUND,
+                message=_("Post not found"),
+                status=status.HTTP_404_NOT_FOUND
             )
 
+        deleted, likes_count = result
+        if deleted:
+            bump_version('post', pk)
+            logger.info("Post unliked successfully | user_id=%s | post_id=%s | ip=%s", request.user.id, pk, ip)
+        return api_response(
+            success=True,
+            message=_("Post unliked successfully"),
+            data={'is_liked': False, 'likes_count': likes_count}
+        )
+
 
 @extend_schema(tags=['like'])
 class PostLikesListAPIView(LanguageMixin, ListAPIView):
@@ -274,19 +400,41 @@ class PostLikesListAPIView(LanguageMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsActiveUser]
 
     def get_queryset(self):
-        return Like.objects.filter(
-            post_id=self.kwargs["pk"]
+        queryset = Like.objects.filter(
+            post_id=self.kwargs["pk"],
+            post__deleted_at__isnull=True
         ).order_by("-created_at")
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
 
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         logger.debug("Post likes list accessed | user_id=%s | post_id=%s | ip=%s", request.user.id, self.kwargs["pk"],
                      ip)
-        response = super().list(request, *args, **kwargs)
+        return streaming_api_response(
+            message=_("Post likes retrieved successfully"),
+            queryset=self.filter_queryset(self.get_queryset()),
+            serializer=self.get_serializer()
+        )
+
+
+@extend_schema(tags=['like'])
+class PostLikeStatusAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = PostIdsSerializer
+    permission_classes = [IsAuthenticated, IsActiveUser]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        liked = set(
+            Like.objects.filter(user=request.user, post_id__in=ids, post__deleted_at__isnull=True)
+            .values_list('post_id', flat=True)
+        )
         return api_response(
             success=True,
-            message=_("Post likes retrieved successfully"),
-            data=response.data
+            message=_("Like statuses retrieved successfully"),
+            data=[{'id': post_id, 'is_liked': post_id in liked} for post_id in ids]
         )
 
 
@@ -295,13 +443,15 @@ class PostLikesListAPIView(LanguageMixin, ListAPIView):
 class CommentCreateAPIView(LanguageMixin, CreateAPIView):
     serializer_class = CommentModelSerializer
     permission_classes = [IsActiveUser]
+    throttle_scope = 'comments'
 
     def perform_create(self, serializer):
-        post = get_object_or_404(Post, id=self.kwargs["post_id"])
+        post = get_object_or_404(Post.objects.visible(), id=self.kwargs["post_id"])
         serializer.save(
             user=self.request.user,
             post=post
         )
+        bump_version('post', post.id)
 
     def create(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -330,6 +480,7 @@ class CommentDeleteAPIView(LanguageMixin, DestroyAPIView):
         try:
             comment = self.get_object()
             super().destroy(request, *args, **kwargs)
+            bump_version('post', comment.post_id)
             logger.warning("Comment deleted | user_id=%s | comment_id=%s | ip=%s", request.user.id, comment.id, ip)
             return api_response(
                 success=True,
@@ -347,21 +498,30 @@ class CommentDeleteAPIView(LanguageMixin, DestroyAPIView):
 
 
 @extend_schema(tags=['comment'])
-class PostCommentsListAPIView(LanguageMixin, ListAPIView):
+class PostCommentsListAPIView(LanguageMixin, ConditionalGetMixin, ListAPIView):
     serializer_class = CommentModelSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
+    def get_validator_parts(self, request, *args, **kwargs):
+        post_id = kwargs.get('post_id')
+        if not Post.objects.visible().filter(pk=post_id).exists():
+            return None
+        # Covers username and avatar edits of any comment author on the post.
+        authors_updated_at = Comment.objects.filter(post_id=post_id).aggregate(
+            latest=Max('user__updated_at'))['latest']
+        return ('comments', post_id, authors_updated_at, request.get_full_path()), 'post', post_id
+
     def get_queryset(self):
         post_id = self.kwargs.get('post_id')
-        return Comment.objects.filter(post_id=post_id).order_by('-created_at')
+        queryset = Comment.objects.filter(post_id=post_id, post__deleted_at__isnull=True).order_by('-created_at')
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
 
     def list(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         logger.debug("Post comments list accessed | user_id=%s | post_id=%s | ip=%s", request.user.id,
                      self.kwargs.get('post_id'), ip)
-        response = super().list(request, *args, **kwargs)
-        return api_response(
-            success=True,
+        return streaming_api_response(
             message=_("Comments retrieved successfully"),
-            data=response.data
+            queryset=self.filter_queryset(self.get_queryset()),
+            serializer=self.get_serializer()
         )
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
 
+from core.i18n import preload_catalogs
+
 
 class AuthConfig(AppConfig):
     name = 'authentication'
+
+    def ready(self):
+        from authentication import signals  # noqa: F401
+        preload_catalogs()
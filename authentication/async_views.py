@@ -0,0 +1,56 @@
+import logging
+from http import HTTPStatus
+
+from django.db.models import Exists, OuterRef
+from django.utils.translation import gettext as _
+
+from app.models import Post, count_subquery
+from authentication.error_codes import ErrorCode
+from authentication.models import User, Follow
+from core.async_views import AsyncAPIView, async_api_response, file_url, sparse_fields
+
+logger = logging.getLogger(__name__)
+
+
+class UserProfileByUsernameAsyncView(AsyncAPIView):
+    """Async twin of `UserProfileByUsernameAPIView`: counters and the follow flag come back in one query."""
+
+    async def aget_validator_parts(self, request, username):
+        row = await User.objects.filter(username=username).values_list('id', 'updated_at').afirst()
+        if row is None:
+            return None
+        user_id, updated_at = row
+        return ('user', user_id, updated_at), 'user', user_id
+
+    async def get(self, request, username):
+        logger.debug("Public profile viewed | viewer=%s | target=%s", request.user.id, username)
+
+        user = await User.objects.filter(username=username).annotate(
+            followers_total=count_subquery(Follow.objects, 'following'),
+            following_total=count_subquery(Follow.objects, 'follower'),
+            posts_total=count_subquery(Post.objects.visible(), 'user'),
+            viewer_follows=Exists(Follow.objects.filter(follower_id=request.user.id, following=OuterRef('pk'))),
+        ).afirst()
+        if user is None:
+            return async_api_response(
+                success=False,
+                error_code=ErrorCode.USER_NOT_FOUND,
+                message=_("User not found"),
+                status=HTTPStatus.NOT_FOUND
+            )
+
+        return async_api_response(
+            success=True,
+            message=_("User profile retrieved successfully"),
+            data=sparse_fields({
+                'username': user.username,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'avatar': file_url(user.avatar),
+                'bio': user.bio,
+                'followers_count': user.followers_total,
+                'following_count': user.following_total,
+                'posts_count': user.posts_total,
+                'is_following': user.viewer_follows,
+            }, request)
+        )
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import math
+
+from redis import RedisError
+
+from authentication.models import User
+from root.settings import redis, AVAILABILITY_BLOOM_CAPACITY, AVAILABILITY_BLOOM_ERROR_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter stored as a plain Redis bitmap, so it needs no server modules.
+    Queries only trust the filter once a rebuild has marked it ready; until then
+    every lookup is treated as a probable hit and falls through to the database.
+    """
+
+    def __init__(self, key, capacity, error_rate):
+        self.key = key
+        self.ready_key = f"{key}:ready"
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+
+    def positions(self, value):
+        digest = hashlib.sha256(value.strip().lower().encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, *values, key=None):
+        pipe = redis.pipeline(transaction=False)
+        for value in values:
+            for position in self.positions(value):
+                pipe.setbit(key or self.key, position, 1)
+        pipe.execute()
+
+    def might_contain(self, value):
+        pipe = redis.pipeline(transaction=False)
+        pipe.exists(self.ready_key)
+        for position in self.positions(value):
+            pipe.getbit(self.key, position)
+        ready, *bits = pipe.execute()
+        return not ready or all(bits)
+
+    def fill_ratio(self):
+        return redis.bitcount(self.key) / self.size
+
+    def estimated_error_rate(self, count):
+        return (1 - math.exp(-self.hash_count * count / self.size)) ** self.hash_count
+
+
+username_filter = BloomFilter('users:bloom:usernames', AVAILABILITY_BLOOM_CAPACITY, AVAILABILITY_BLOOM_ERROR_RATE)
+email_filter = BloomFilter('users:bloom:emails', AVAILABILITY_BLOOM_CAPACITY, AVAILABILITY_BLOOM_ERROR_RATE)
+
+
+def _might_contain(bloom, value):
+    try:
+        return bloom.might_contain(value)
+    except RedisError:
+        logger.warning("Availability index unavailable | key=%s", bloom.key)
+        return True
+
+
+def is_username_taken(username, exclude_id=None):
+    if not _might_contain(username_filter, username):
+        return False
+    return User.objects.filter(username=username).exclude(id=exclude_id).exists()
+
+
+def is_email_taken(email):
+    if not _might_contain(email_filter, email):
+        return False
+    return User.objects.filter(email=email).exists()
+
+
+def index_user(user):
+    """
+    Record a created or renamed user. Bloom filters cannot forget, so old usernames
+    stay as false positives (resolved by the database check) until the next rebuild.
+    """
+    try:
+        username_filter.add(user.username)
+        email_filter.add(user.email)
+    except RedisError:
+        logger.warning("Availability index update failed | user_id=%s", user.id)
@@ -0,0 +1,95 @@
+import json
+import logging
+
+from django.db import DEFAULT_DB_ALIAS
+from redis import RedisError
+
+from authentication.models import User
+from core.cache import TTLCache
+from root.settings import redis, aredis, USER_CACHE_TTL, USER_CACHE_LOCAL_TTL, USER_CACHE_LOCAL_MAXSIZE
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ('id', 'username', 'language', 'is_deleted', 'is_staff', 'is_active')
+
+local_cache = TTLCache(maxsize=USER_CACHE_LOCAL_MAXSIZE, ttl=USER_CACHE_LOCAL_TTL)
+
+
+def snapshot_key(user_id):
+    return f"user:snapshot:{user_id}"
+
+
+def build_user(snapshot):
+    """
+    Turn a snapshot into a `User` instance with only the snapshot fields loaded.
+    Any other field is deferred and fetched on first access, and `save()` only
+    writes the loaded fields, so the instance is safe to pass around as `request.user`.
+    """
+    values = [snapshot[field] for field in SNAPSHOT_FIELDS]
+    return User.from_db(DEFAULT_DB_ALIAS, list(SNAPSHOT_FIELDS), values)
+
+
+def get_user_snapshot(user_id):
+    key = snapshot_key(user_id)
+
+    snapshot = local_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        raw = redis.get(key)
+    except RedisError:
+        logger.warning("User snapshot cache unavailable | user_id=%s", user_id)
+        raw = None
+
+    if raw:
+        snapshot = json.loads(raw)
+    else:
+        snapshot = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        try:
+            redis.setex(key, USER_CACHE_TTL, json.dumps(snapshot))
+        except RedisError:
+            logger.warning("User snapshot cache unavailable | user_id=%s", user_id)
+
+    local_cache.set(key, snapshot)
+    return snapshot
+
+
+async def aget_user_snapshot(user_id):
+    """`get_user_snapshot` for async views, using the async Redis client and async ORM."""
+    key = snapshot_key(user_id)
+
+    snapshot = local_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        raw = await aredis.get(key)
+    except RedisError:
+        logger.warning("User snapshot cache unavailable | user_id=%s", user_id)
+        raw = None
+
+    if raw:
+        snapshot = json.loads(raw)
+    else:
+        snapshot = await User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).afirst()
+        if snapshot is None:
+            return None
+        try:
+            await aredis.setex(key, USER_CACHE_TTL, json.dumps(snapshot))
+        except RedisError:
+            logger.warning("User snapshot cache unavailable | user_id=%s", user_id)
+
+    local_cache.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    key = snapshot_key(user_id)
+    local_cache.delete(key)
+    try:
+        redis.delete(key)
+    except RedisError:
+        logger.warning("User snapshot invalidation failed | user_id=%s", user_id)
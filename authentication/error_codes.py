@@ -5,5 +5,8 @@ class ErrorCode:
     USER_BLOCKED = "ERR_003"
     USER_NOT_FOUND = "ERR_004"
     SELF_FOLLOW = "ERR_005"
+    # No longer returned since follow/unfollow became idempotent; kept reserved so older clients keep parsing.
     ALREADY_FOLLOWED = "ERR_006"
     NOT_FOLLOWING = "ERR_007"
+    VERIFICATION_RESEND_COOLDOWN = "ERR_008"
+    USERNAME_TAKEN = "ERR_009"
@@ -0,0 +1,102 @@
+import gzip
+import logging
+import tempfile
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from app.models import Post, Comment, Like, PostView
+from authentication.models import User, Follow, supabase_storage
+from root.settings import redis, EXPORT_CHUNK_SIZE, EXPORT_COMPRESS_LEVEL, EXPORT_URL_TTL, EXPORT_LOCK_TTL
+
+logger = logging.getLogger(__name__)
+
+# Each line of an export is one `{"type": <section>, ...}` object. Rows are read from server-side
+# cursors as plain dicts and written straight to a temporary file, so memory stays flat however
+# many rows an account has.
+SECTIONS = (
+    ('profile', lambda user_id: User.objects.filter(pk=user_id).values(
+        'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'language', 'date_joined',
+        'last_login')),
+    ('post', lambda user_id: Post.objects.visible().filter(user_id=user_id).values(
+        'id', 'caption', 'image', 'is_edited', 'created_at', 'updated_at')),
+    ('comment', lambda user_id: Comment.objects.filter(user_id=user_id).values(
+        'id', 'post_id', 'text', 'created_at')),
+    ('like', lambda user_id: Like.objects.filter(user_id=user_id).values('post_id', 'created_at')),
+    ('following', lambda user_id: Follow.objects.filter(follower_id=user_id).values('following_id', 'created_at')),
+    ('follower', lambda user_id: Follow.objects.filter(following_id=user_id).values('follower_id', 'created_at')),
+    ('view', lambda user_id: PostView.objects.filter(user_id=user_id).values('post_id')),
+)
+
+
+def export_key(user_id):
+    return f"export:{user_id}"
+
+
+def mark_export_queued(user_id):
+    """
+    Flag a new export as queued, keeping the previous export's file downloadable meanwhile.
+    Returns False when one is already queued or running (and has not outlived the task lock).
+    """
+    key = export_key(user_id)
+    state = redis.hmget(key, 'status', 'queued_at')
+    if state[0] in ('queued', 'running') and time.time() - float(state[1] or 0) < EXPORT_LOCK_TTL:
+        return False
+    redis.hset(key, mapping={'status': 'queued', 'queued_at': time.time()})
+    redis.expire(key, EXPORT_URL_TTL)
+    return True
+
+
+def write_export(user_id, stream):
+    """Write every section for `user_id` to a text stream; returns the number of rows written."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    rows = 0
+    for kind, queryset in SECTIONS:
+        for row in queryset(user_id).order_by().iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['type'] = kind
+            stream.write(encoder.encode(row))
+            stream.write('\n')
+            rows += 1
+    return rows
+
+
+def export_user(user_id, compress=True):
+    """Build the export, upload it and record where it lives. Returns the storage name."""
+    redis.hset(export_key(user_id), mapping={'status': 'running'})
+    started = time.perf_counter()
+
+    suffix = '.ndjson.gz' if compress else '.ndjson'
+    name = f"exports/{user_id}/{timezone.now():%Y%m%d%H%M%S}{suffix}"
+    try:
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            if compress:
+                with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=EXPORT_COMPRESS_LEVEL) as stream:
+                    rows = write_export(user_id, stream)
+            else:
+                with open(tmp.name, 'w', encoding='utf-8') as stream:
+                    rows = write_export(user_id, stream)
+            tmp.flush()
+            content_type = 'application/gzip' if compress else 'application/x-ndjson'
+            supabase_storage.upload(name, tmp.name, content_type)
+    except Exception:
+        redis.hset(export_key(user_id), mapping={'status': 'failed'})
+        raise
+
+    elapsed = time.perf_counter() - started
+    redis.hset(export_key(user_id), mapping={'status': 'ready', 'name': name, 'rows': rows})
+    redis.expire(export_key(user_id), EXPORT_URL_TTL)
+    logger.info(
+        "Account export written | user_id=%s | rows=%s | seconds=%.1f | rows_per_second=%.0f",
+        user_id, rows, elapsed, rows / elapsed if elapsed else rows
+    )
+    return name
+
+
+def export_status(user_id):
+    """Current export state for a user, with a fresh signed URL for the latest finished file."""
+    state = redis.hgetall(export_key(user_id))
+    state.pop('queued_at', None)
+    if state.get('name'):
+        state['url'] = supabase_storage.signed_url(state['name'], EXPORT_URL_TTL)
+    return state or None
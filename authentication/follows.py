@@ -0,0 +1,70 @@
+from django.db import connection, transaction, IntegrityError
+from django.utils import timezone
+
+from authentication.models import User, Follow
+
+USER_TABLE = User._meta.db_table
+FOLLOW_TABLE = Follow._meta.db_table
+
+
+def follow_counts(cursor, follower_id, target_id):
+    """`(target's followers, follower's following)` read inside the caller's transaction."""
+    cursor.execute(
+        f'SELECT (SELECT COUNT(*) FROM "{FOLLOW_TABLE}" WHERE "following_id" = %s), '
+        f'(SELECT COUNT(*) FROM "{FOLLOW_TABLE}" WHERE "follower_id" = %s)',
+        [target_id, follower_id]
+    )
+    return cursor.fetchone()
+
+
+def find_target(cursor, username, active_only):
+    query = f'SELECT "id" FROM "{USER_TABLE}" WHERE "username" = %s'
+    params = [username]
+    if active_only:
+        query += ' AND "is_deleted" = %s'
+        params.append(False)
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def follow_user(follower_id, username):
+    """
+    Idempotent follow by username in a single conflict-aware insert.
+    Returns `(target_id, created, followers_count, following_count)`, or None when
+    there is no active account with that username. Self-follows are the caller's check.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{FOLLOW_TABLE}" ("follower_id", "following_id", "created_at") '
+                f'SELECT %s, "id", %s FROM "{USER_TABLE}" WHERE "username" = %s AND "is_deleted" = %s '
+                f'ON CONFLICT ("follower_id", "following_id") DO NOTHING RETURNING "following_id"',
+                [follower_id, now, username, False]
+            )
+            row = cursor.fetchone()
+            created = row is not None
+            target_id = row[0] if created else find_target(cursor, username, active_only=True)
+            if target_id is None:
+                return None
+            return (target_id, created, *follow_counts(cursor, follower_id, target_id))
+    except IntegrityError:
+        # The target was removed before the deferred FK check ran.
+        return None
+
+
+def unfollow_user(follower_id, username):
+    """Idempotent unfollow. Same return shape as `follow_user`, with `deleted` in place of `created`."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM "{FOLLOW_TABLE}" WHERE "follower_id" = %s AND "following_id" = '
+            f'(SELECT "id" FROM "{USER_TABLE}" WHERE "username" = %s) RETURNING "following_id"',
+            [follower_id, username]
+        )
+        row = cursor.fetchone()
+        deleted = row is not None
+        target_id = row[0] if deleted else find_target(cursor, username, active_only=False)
+        if target_id is None:
+            return None
+        return (target_id, deleted, *follow_counts(cursor, follower_id, target_id))
@@ -0,0 +1,223 @@
+import logging
+
+from redis import RedisError, WatchError
+
+from authentication.models import Follow
+from root.settings import redis, FOLLOW_GRAPH_TTL
+
+logger = logging.getLogger(__name__)
+
+# Every cached set holds this member so an account with no follows is still a cache hit.
+SENTINEL = '0'
+
+# KEYS - following set of the follower, followers set of the target, then their generation counters.
+# ARGV - follower id, target id, generation TTL. Sets that are not cached are left alone; they are
+# rebuilt from the database on the next read. Bumping the generations aborts a rebuild that read
+# the database before this change landed (see `_load`).
+ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then redis.call('SADD', KEYS[1], ARGV[2]) end
+if redis.call('EXISTS', KEYS[2]) == 1 then redis.call('SADD', KEYS[2], ARGV[1]) end
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], ARGV[3])
+return 1
+"""
+
+REMOVE_SCRIPT = """
+redis.call('SREM', KEYS[1], ARGV[2])
+redis.call('SREM', KEYS[2], ARGV[1])
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], ARGV[3])
+return 1
+"""
+
+CONSISTENCY_CURSOR_KEY = "graph:consistency:cursor"
+
+add_script = redis.register_script(ADD_SCRIPT)
+remove_script = redis.register_script(REMOVE_SCRIPT)
+
+
+def following_key(user_id):
+    return f"graph:following:{user_id}"
+
+
+def followers_key(user_id):
+    return f"graph:followers:{user_id}"
+
+
+def generation_key(key):
+    return f"{key}:gen"
+
+
+def _edge_keys(follower_id, target_id):
+    keys = [following_key(follower_id), followers_key(target_id)]
+    return keys + [generation_key(key) for key in keys]
+
+
+def _load(key, lookup, column):
+    with redis.pipeline() as pipe:
+        pipe.watch(generation_key(key))
+        ids = list(Follow.objects.filter(**lookup).values_list(column, flat=True))
+        try:
+            pipe.multi()
+            pipe.delete(key)
+            pipe.sadd(key, SENTINEL, *ids)
+            pipe.expire(key, FOLLOW_GRAPH_TTL)
+            pipe.execute()
+        except WatchError:
+            # A follow or unfollow landed while the database was read; leave the set for the next read.
+            logger.info("Follow graph rebuild raced a write | key=%s", key)
+    return set(ids)
+
+
+def load_following(user_id):
+    return _load(following_key(user_id), {'follower_id': user_id}, 'following_id')
+
+
+def load_followers(user_id):
+    return _load(followers_key(user_id), {'following_id': user_id}, 'follower_id')
+
+
+def _members(key, loader, user_id):
+    try:
+        members = redis.smembers(key)
+        if members:
+            return {int(member) for member in members if member != SENTINEL}
+        return loader(user_id)
+    except RedisError:
+        logger.warning("Follow graph cache unavailable | key=%s", key)
+        return None
+
+
+def following_ids(user_id):
+    ids = _members(following_key(user_id), load_following, user_id)
+    if ids is None:
+        ids = set(Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True))
+    return ids
+
+
+def follower_ids(user_id):
+    ids = _members(followers_key(user_id), load_followers, user_id)
+    if ids is None:
+        ids = set(Follow.objects.filter(following_id=user_id).values_list('follower_id', flat=True))
+    return ids
+
+
+def is_following(follower_id, target_id):
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.exists(following_key(follower_id))
+        pipe.sismember(following_key(follower_id), target_id)
+        cached, member = pipe.execute()
+        if cached:
+            return bool(member)
+        return target_id in load_following(follower_id)
+    except RedisError:
+        return Follow.objects.filter(follower_id=follower_id, following_id=target_id).exists()
+
+
+def filter_following(follower_id, target_ids):
+    """Return the subset of `target_ids` that `follower_id` follows, in one round trip when cached."""
+    target_ids = list(target_ids)
+    if not target_ids:
+        return set()
+    try:
+        if redis.exists(following_key(follower_id)):
+            flags = redis.smismember(following_key(follower_id), target_ids)
+            return {target_id for target_id, flag in zip(target_ids, flags) if flag}
+    except RedisError:
+        pass
+    return following_ids(follower_id) & set(target_ids)
+
+
+def mutual_following(user_id, other_id):
+    """Accounts followed by both users."""
+    try:
+        if not redis.exists(following_key(user_id)):
+            load_following(user_id)
+        if not redis.exists(following_key(other_id)):
+            load_following(other_id)
+        return {int(member) for member in redis.sinter(following_key(user_id), following_key(other_id))
+                if member != SENTINEL}
+    except RedisError:
+        return following_ids(user_id) & following_ids(other_id)
+
+
+def following_count(user_id):
+    return len(following_ids(user_id))
+
+
+def followers_count(user_id):
+    try:
+        count = redis.scard(followers_key(user_id))
+        if count:
+            return count - 1
+    except RedisError:
+        pass
+    return len(follower_ids(user_id))
+
+
+def record_follow(follower_id, target_id):
+    try:
+        add_script(keys=_edge_keys(follower_id, target_id), args=[follower_id, target_id, FOLLOW_GRAPH_TTL])
+    except RedisError:
+        invalidate_graph(follower_id, target_id)
+
+
+def record_unfollow(follower_id, target_id):
+    try:
+        remove_script(keys=_edge_keys(follower_id, target_id), args=[follower_id, target_id, FOLLOW_GRAPH_TTL])
+    except RedisError:
+        invalidate_graph(follower_id, target_id)
+
+
+def record_unfollows(pairs):
+    """Apply many `(follower_id, target_id)` removals in one pipelined round trip."""
+    pipe = redis.pipeline(transaction=False)
+    for follower_id, target_id in pairs:
+        remove_script(keys=_edge_keys(follower_id, target_id), args=[follower_id, target_id, FOLLOW_GRAPH_TTL],
+                      client=pipe)
+    pipe.execute()
+
+
+def invalidate_graph(follower_id, target_id):
+    try:
+        redis.delete(following_key(follower_id), followers_key(target_id))
+    except RedisError:
+        logger.error("Follow graph invalidation failed | follower=%s | following=%s", follower_id, target_id)
+
+
+def check_consistency(sample_size):
+    """
+    Compare a sample of cached adjacency sets with the database and drop the ones that drifted,
+    so the next read rebuilds them. The SCAN cursor is kept between runs, so successive runs walk
+    the whole keyspace instead of re-checking the same keys. Returns the number of sets dropped.
+    """
+    dropped = 0
+    for kind, lookup, column in (
+            ('following', 'follower_id', 'following_id'),
+            ('followers', 'following_id', 'follower_id'),
+    ):
+        pattern = f"graph:{kind}:*"
+        cursor = int(redis.hget(CONSISTENCY_CURSOR_KEY, kind) or 0)
+        checked = 0
+        while checked < sample_size:
+            cursor, keys = redis.scan(cursor, match=pattern, count=sample_size)
+            for key in keys:
+                if key.endswith(':gen'):
+                    continue
+                checked += 1
+                user_id = int(key.rsplit(':', 1)[1])
+                cached = {int(member) for member in redis.smembers(key) if member != SENTINEL}
+                actual = set(Follow.objects.filter(**{lookup: user_id}).values_list(column, flat=True))
+                if cached != actual:
+                    logger.warning("Follow graph drift repaired | key=%s", key)
+                    redis.delete(key)
+                    dropped += 1
+            if cursor == 0:
+                break
+        redis.hset(CONSISTENCY_CURSOR_KEY, kind, cursor)
+    return dropped
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import User
+
+PATHS = (
+    ('feed', '/api/v1/home/', '/api/v1/async/home/'),
+    ('profile', '/api/v1/users/{username}/', '/api/v1/async/users/{username}/'),
+)
+
+
+class Command(BaseCommand):
+    help = "Compare throughput of the sync DRF views and their native async counterparts under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        headers = {'Authorization': f"Bearer {AccessToken.for_user(user)}"}
+        total, concurrency = options['requests'], options['concurrency']
+
+        paths = [
+            (label, sync_path.format(username=user.username), async_path.format(username=user.username))
+            for label, sync_path, async_path in PATHS
+        ]
+
+        sync_elapsed = {}
+        for label, sync_path, _async_path in paths:
+            started = time.perf_counter()
+            self.run_sync(sync_path, headers, total, concurrency)
+            sync_elapsed[label] = time.perf_counter() - started
+
+        # One event loop for every async round: the shared async Redis client is bound to the loop it first ran on.
+        async_elapsed = asyncio.run(self.run_all_async(paths, headers, total, concurrency))
+
+        for label, _sync_path, _async_path in paths:
+            self.stdout.write(
+                f"{label:<8} sync {total / sync_elapsed[label]:8.1f} req/s | "
+                f"async {total / async_elapsed[label]:8.1f} req/s"
+            )
+
+    async def run_all_async(self, paths, headers, total, concurrency):
+        elapsed = {}
+        for label, _sync_path, async_path in paths:
+            started = time.perf_counter()
+            await self.run_async(async_path, headers, total, concurrency)
+            elapsed[label] = time.perf_counter() - started
+        return elapsed
+
+    @staticmethod
+    def run_sync(path, headers, total, concurrency):
+        def fetch(_):
+            return Client(headers=headers).get(path).status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(fetch, range(total)))
+
+    @staticmethod
+    async def run_async(path, headers, total, concurrency):
+        client = AsyncClient(headers=headers)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                return (await client.get(path)).status_code
+
+        await asyncio.gather(*(fetch() for _ in range(total)))
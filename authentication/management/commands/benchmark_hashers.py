@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+from core.hashing import hash_password
+
+
+class Command(BaseCommand):
+    help = "Measure password hashing cost per hasher and throughput through the hashing executor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5, help="Hashes per hasher for the latency run.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent callers for the executor run.")
+        parser.add_argument('--requests', type=int, default=64, help="Total hashes for the executor run.")
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+
+        self.stdout.write("Per-hasher latency (inline):")
+        for hasher in get_hashers():
+            salt = hasher.salt()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                hasher.encode('benchmark-password', salt)
+            elapsed = (time.perf_counter() - started) / rounds
+            self.stdout.write(f"  {hasher.algorithm:<24} {elapsed * 1000:8.1f} ms/hash")
+
+        total = options['requests']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as callers:
+            list(callers.map(hash_password, ['benchmark-password'] * total))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Executor: {total} hashes from {options['concurrency']} callers in {elapsed:.2f}s "
+            f"({total / elapsed:.1f} hashes/s)"
+        )
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import translation
+
+from core.i18n import resolve_language
+from root.settings import LANGUAGES
+
+
+def legacy_negotiation(request, user_language):
+    """The pre-refactor sequence: middleware, LocaleMiddleware, then LanguageMixin re-activating."""
+    language = 'en'
+    lang_header = request.META.get('HTTP_ACCEPT_LANGUAGE', '').split(',')[0].split('-')[0]
+    if lang_header and lang_header in dict(LANGUAGES):
+        language = lang_header
+    translation.activate(language)
+    translation.activate(translation.get_language_from_request(request))
+    translation.deactivate()
+    translation.activate(user_language)
+    translation.deactivate()
+
+
+def single_pass_negotiation(request, user_language):
+    translation.activate(resolve_language(request))
+    if user_language != translation.get_language():
+        translation.activate(user_language)
+    translation.deactivate()
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark per-request language negotiation before and after the single-pass refactor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/', HTTP_ACCEPT_LANGUAGE='ru-RU,ru;q=0.9,en;q=0.8')
+        iterations = options['iterations']
+
+        for label, negotiate in (("legacy", legacy_negotiation), ("single pass", single_pass_negotiation)):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                negotiate(request, 'uz')
+            per_request = (time.perf_counter() - started) / iterations * 1_000_000
+            self.stdout.write(f"{label:<12} {per_request:8.2f} us/request")
@@ -0,0 +1,50 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.log import JsonFormatter, queue_file_handler
+from core.utils import RequestLoggingMiddleware
+
+
+class Command(BaseCommand):
+    help = "Compare per-request cost of RequestLoggingMiddleware with a synchronous FileHandler and the queue handler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--path', default='/api/v1/users/me', help="Path to request; pick one that is not sampled out.")
+
+    def handle(self, *args, **options):
+        logger = logging.getLogger("requests_logger")
+        original_handlers = logger.handlers[:]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sync_handler = logging.FileHandler(os.path.join(tmp, 'sync.log'))
+            sync_handler.setFormatter(logging.Formatter("[{levelname}] {asctime} | {message}", style='{'))
+
+            queued_handler = queue_file_handler(os.path.join(tmp, 'queued.log'), max_bytes=50 * 1024 * 1024)
+            queued_handler.setFormatter(JsonFormatter())
+
+            try:
+                for label, handler in (("sync FileHandler", sync_handler), ("QueueHandler", queued_handler)):
+                    logger.handlers = [handler]
+                    per_request = self.run(options['requests'], options['path'])
+                    self.stdout.write(f"{label:<18} {per_request:8.2f} us/request")
+            finally:
+                logger.handlers = original_handlers
+                queued_handler.close()
+                sync_handler.close()
+
+    @staticmethod
+    def run(total, path):
+        factory = RequestFactory()
+        middleware = RequestLoggingMiddleware(lambda request: HttpResponse())
+
+        started = time.perf_counter()
+        for _ in range(total):
+            middleware(factory.get(path))
+        return (time.perf_counter() - started) / total * 1_000_000
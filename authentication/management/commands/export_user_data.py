@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.export import export_user, export_status
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    help = "Export all data of one account as NDJSON to storage and print a download link."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--no-gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        user_id = User.objects.filter(username=options['username']).values_list('id', flat=True).first()
+        if user_id is None:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        export_user(user_id, compress=not options['no_gzip'])
+        state = export_status(user_id)
+        self.stdout.write(self.style.SUCCESS(f"Exported {state['rows']} rows to {state['name']}"))
+        self.stdout.write(state['url'])
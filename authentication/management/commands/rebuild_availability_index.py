@@ -0,0 +1,74 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication.availability import username_filter, email_filter
+from authentication.models import User
+from root.settings import redis
+
+
+class Command(BaseCommand):
+    help = "Rebuild the username/email availability Bloom filters and report their false-positive rate."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report-only', action='store_true', help="Skip the rebuild and only print the report.")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--probes', type=int, default=10000,
+                            help="Random unused names to probe for the measured false-positive rate.")
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            self.rebuild(options['chunk_size'])
+        self.report(options['probes'])
+
+    def rebuild(self, chunk_size):
+        started = timezone.now()
+        tmp_username_key = f"{username_filter.key}:tmp"
+        tmp_email_key = f"{email_filter.key}:tmp"
+        redis.delete(tmp_username_key, tmp_email_key)
+
+        batch = []
+        rows = User.objects.values_list('username', 'email').iterator(chunk_size=chunk_size)
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                self.add_batch(batch, tmp_username_key, tmp_email_key)
+                batch = []
+        self.add_batch(batch, tmp_username_key, tmp_email_key)
+
+        pipe = redis.pipeline()
+        pipe.rename(tmp_username_key, username_filter.key)
+        pipe.rename(tmp_email_key, email_filter.key)
+        pipe.set(username_filter.ready_key, 1)
+        pipe.set(email_filter.ready_key, 1)
+        pipe.execute()
+
+        # Users written while the rebuild ran went into the old bitmaps; add them again.
+        recent = User.objects.filter(Q(date_joined__gte=started) | Q(updated_at__gte=started))
+        self.add_batch(list(recent.values_list('username', 'email')))
+
+        self.stdout.write(self.style.SUCCESS("Availability index rebuilt"))
+
+    @staticmethod
+    def add_batch(batch, username_key=None, email_key=None):
+        if not batch:
+            return
+        usernames, emails = zip(*batch)
+        username_filter.add(*usernames, key=username_key)
+        email_filter.add(*emails, key=email_key)
+
+    def report(self, probes):
+        count = User.objects.count()
+        false_positives = sum(
+            username_filter.might_contain(f"probe_{uuid.uuid4().hex}") for _ in range(probes)
+        )
+
+        self.stdout.write(f"Users indexed:          {count}")
+        self.stdout.write(f"Bits / hash functions:  {username_filter.size} / {username_filter.hash_count}")
+        self.stdout.write(f"Username fill ratio:    {username_filter.fill_ratio():.4f}")
+        self.stdout.write(f"Email fill ratio:       {email_filter.fill_ratio():.4f}")
+        self.stdout.write(f"Expected FP rate:       {username_filter.estimated_error_rate(count):.4%}")
+        if probes:
+            self.stdout.write(f"Measured FP rate:       {false_positives / probes:.4%} ({probes} probes)")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+from authentication.search import members_for, terms_key
+from root.settings import redis, SEARCH_INDEX_KEY
+
+
+class Command(BaseCommand):
+    help = "Rebuild the user typeahead prefix index from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        tmp_key = f"{SEARCH_INDEX_KEY}:tmp"
+        redis.delete(tmp_key)
+
+        rows = User.objects.filter(is_deleted=False, is_active=True).values_list(
+            'id', 'username', 'first_name', 'last_name'
+        ).iterator(chunk_size=options['chunk_size'])
+
+        pipe = redis.pipeline(transaction=False)
+        count = 0
+        for user_id, username, first_name, last_name in rows:
+            members = members_for(user_id, username, first_name, last_name)
+            pipe.zadd(tmp_key, {member: 0 for member in members})
+            pipe.delete(terms_key(user_id))
+            pipe.sadd(terms_key(user_id), *members)
+            count += 1
+            if count % options['chunk_size'] == 0:
+                pipe.execute()
+        pipe.execute()
+
+        if redis.exists(tmp_key):
+            redis.rename(tmp_key, SEARCH_INDEX_KEY)
+        else:
+            redis.delete(SEARCH_INDEX_KEY)
+
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt for {count} users"))
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ("Run a local SMTP server that accepts and discards every message. "
+            "Point EMAIL_HOST/EMAIL_PORT at it with EMAIL_USE_TLS=false for tests and benchmarks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--report-every', type=int, default=100, help="Print throughput every N messages.")
+
+    def handle(self, *args, **options):
+        self.received = 0
+        self.connections = 0
+        self.started = time.perf_counter()
+        self.report_every = options['report_every']
+        asyncio.run(self.serve(options['host'], options['port']))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.stdout.write(f"SMTP sink listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 smtp-sink ready\r\n")
+        await writer.drain()
+
+        while line := await reader.readline():
+            command = line.decode(errors='replace').strip().upper()
+
+            if command.startswith('EHLO'):
+                writer.write(b"250-smtp-sink\r\n250 8BITMIME\r\n")
+            elif command == 'DATA':
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                    pass
+                self.received += 1
+                if self.received % self.report_every == 0:
+                    elapsed = time.perf_counter() - self.started
+                    self.stdout.write(
+                        f"{self.received} messages over {self.connections} connections "
+                        f"({self.received / elapsed:.1f} msg/s)"
+                    )
+                writer.write(b"250 OK\r\n")
+            elif command == 'QUIT':
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                # HELO, MAIL, RCPT, RSET and NOOP are all simply accepted.
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+
+        writer.close()
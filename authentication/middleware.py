@@ -1,29 +1,48 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils import translation
-from root.settings import LANGUAGES
+from django.utils.cache import patch_vary_headers
+
+from core.i18n import resolve_language
 
 
 class UserLanguageMiddleware:
+    """
+    The single language-resolution stage. It stores the result on `request.LANGUAGE_CODE`;
+    `LanguageMixin` only switches again when a JWT-authenticated user prefers another language.
+    Runs natively under both WSGI and ASGI, so async views are not adapted through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        language = 'en'
-
-        lang_header = request.META.get('HTTP_ACCEPT_LANGUAGE', '').split(',')[0].split('-')[0]
-
-        if lang_header and lang_header in dict(LANGUAGES):
-            language = lang_header
-
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            user_lang = getattr(request.user, 'language', None)
-            if user_lang and user_lang in dict(LANGUAGES):
-                language = user_lang
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
+        self.activate(request, getattr(request, 'user', None))
+        response = self.get_response(request)
+        return self.finish(response)
+
+    async def __acall__(self, request):
+        # `request.user` is lazy and would query the session store from the event loop.
+        user = await request.auser() if hasattr(request, 'auser') else None
+        self.activate(request, user)
+        response = await self.get_response(request)
+        return self.finish(response)
+
+    @staticmethod
+    def activate(request, user):
+        language = resolve_language(request, user)
         translation.activate(language)
         request.LANGUAGE_CODE = language
 
-        response = self.get_response(request)
-
+    @staticmethod
+    def finish(response):
+        patch_vary_headers(response, ('Accept-Language',))
+        response.headers.setdefault('Content-Language', translation.get_language())
         translation.deactivate()
-
-        return response
\ No newline at end of file
+        return response
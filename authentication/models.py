@@ -1,6 +1,6 @@
 from ckeditor.fields import RichTextField
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.db.models import Model, ForeignKey, CASCADE, ImageField
+from django.db.models import Model, ForeignKey, CASCADE, ImageField, Index, Q, QuerySet
 from django.db.models.fields import EmailField, DateTimeField, CharField, BooleanField, URLField
 from django.utils.translation import gettext_lazy as _
 
@@ -9,6 +9,20 @@ from core.storage import SupabaseStorage
 supabase_storage = SupabaseStorage()
 
 
+class UserQuerySet(QuerySet):
+    def active(self):
+        return self.filter(is_deleted=False)
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+class ActiveUserManager(CustomUserManager):
+    def get_queryset(self):
+        return super().get_queryset().active()
+
+
 class User(AbstractUser):
     language = CharField(
         max_length=5,
@@ -22,11 +36,18 @@ class User(AbstractUser):
     is_deleted = BooleanField(default=False)
     deleted_at = DateTimeField(null=True, blank=True)
 
-    objects = UserManager()
+    objects = CustomUserManager()
+    active = ActiveUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            Index(fields=['-date_joined'], condition=Q(is_deleted=False), name='user_active_joined_idx'),
+            Index(fields=['is_deleted', 'deleted_at'], condition=Q(is_deleted=True), name='user_deleted_at_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -44,13 +65,29 @@ class User(AbstractUser):
 
     @property
     def posts_count(self):
-        return self.posts.count()
+        return self.posts.filter(deleted_at__isnull=True).count()
+
+
+def followed_by(user_id, active_only=False):
+    """
+    Subquery of the accounts `user_id` follows, for `user_id__in=` filters. The database walks
+    the follower index itself, so heavy followers never turn into a giant literal IN list.
+    `active_only` drops deleted accounts inside the subquery, so outer queries need no user join.
+    """
+    follows = Follow.objects.filter(follower_id=user_id)
+    if active_only:
+        follows = follows.filter(following__is_deleted=False)
+    return follows.values('following_id')
 
 
 class Follow(Model):
     class Meta:
         ordering = ('-created_at',)
         unique_together = ('follower', 'following')
+        indexes = [
+            Index(fields=['following', '-created_at', '-id'], name='follow_followers_page_idx'),
+            Index(fields=['follower', '-created_at', '-id'], name='follow_following_page_idx'),
+        ]
         verbose_name = _('Follow')
         verbose_name_plural = _('Follows')
 
@@ -0,0 +1,131 @@
+import logging
+from datetime import timedelta
+
+from django.db import connection, IntegrityError
+from django.utils import timezone
+
+from app.models import Post, Like, Comment, PostView
+from app.tasks import delete_media
+from authentication.cache import invalidate_user_snapshot
+from authentication.graph import record_unfollows, following_key, followers_key
+from authentication.models import User, Follow
+from core.conditional import bump_version
+from root.settings import redis, ACCOUNT_PURGE_AFTER_DAYS, ACCOUNT_PURGE_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# (step name, model, column pointing at the purged user, column passed on to the step's cleanup).
+# Children of the user's posts go first so the post rows can be removed without a cascade.
+STEPS = (
+    ('post_likes', Like, 'post__user_id', None),
+    ('post_comments', Comment, 'post__user_id', None),
+    ('post_views', PostView, 'post__user_id', None),
+    ('likes', Like, 'user_id', 'post_id'),
+    ('comments', Comment, 'user_id', 'post_id'),
+    ('views', PostView, 'user_id', 'post_id'),
+    ('following', Follow, 'follower_id', 'following_id'),
+    ('followers', Follow, 'following_id', 'follower_id'),
+    ('posts', Post, 'user_id', 'image'),
+)
+
+
+def checkpoint_key(user_id):
+    return f"purge:{user_id}"
+
+
+def purge_candidates(limit):
+    cutoff = timezone.now() - timedelta(days=ACCOUNT_PURGE_AFTER_DAYS)
+    candidates = User.objects.filter(is_deleted=True, deleted_at__lt=cutoff).order_by('deleted_at')
+    return list(candidates.values_list('id', flat=True)[:limit])
+
+
+def claim_user(user_id):
+    """
+    Lock the account out before any rows go, so a login cannot reactivate a half-purged user,
+    and tombstone its posts so likes, comments and views cannot land on them mid-purge.
+    Returns False when the account was reactivated or already removed.
+    """
+    cutoff = timezone.now() - timedelta(days=ACCOUNT_PURGE_AFTER_DAYS)
+    claimed = User.objects.filter(pk=user_id, is_deleted=True, deleted_at__lt=cutoff).update(is_active=False)
+    if claimed:
+        invalidate_user_snapshot(user_id)
+    # A resumed purge has already flipped is_active.
+    elif not User.objects.filter(pk=user_id, is_deleted=True, deleted_at__lt=cutoff, is_active=False).exists():
+        return False
+    Post.objects.visible().filter(user_id=user_id).update(deleted_at=timezone.now())
+    return True
+
+
+def delete_chunk(model, user_column, extra_column, user_id, after_id, chunk_size):
+    columns = ('id', extra_column) if extra_column else ('id',)
+    rows = list(
+        model.objects.filter(**{user_column: user_id, 'id__gt': after_id})
+        .order_by('id').values_list(*columns)[:chunk_size]
+    )
+    if not rows:
+        return [], None
+
+    ids = [row[0] for row in rows]
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{model._meta.db_table}" WHERE "id" IN ({placeholders})', ids)
+
+    return [row[1] for row in rows] if extra_column else [], ids[-1]
+
+
+def after_chunk(step, user_id, values):
+    """Fix up everything derived from the rows that were just removed."""
+    if not values:
+        return
+    if step in ('likes', 'comments', 'views'):
+        bump_version('post', *set(values))
+    elif step == 'following':
+        record_unfollows([(user_id, target_id) for target_id in values])
+        bump_version('user', *values)
+    elif step == 'followers':
+        record_unfollows([(follower_id, user_id) for follower_id in values])
+        bump_version('user', *values)
+    elif step == 'posts':
+        delete_media.delay([name for name in values if name])
+
+
+def purge_user(user_id, chunk_size=ACCOUNT_PURGE_CHUNK_SIZE):
+    """
+    Delete a soft-deleted account and everything it owns in bounded primary-key chunks.
+    Progress is checkpointed in Redis after every chunk, so an interrupted purge resumes
+    where it stopped instead of starting over.
+    """
+    if not claim_user(user_id):
+        redis.delete(checkpoint_key(user_id))
+        return False
+
+    checkpoint = redis.hgetall(checkpoint_key(user_id))
+    start_step = int(checkpoint.get('step', 0))
+    after_id = int(checkpoint.get('after_id', 0))
+
+    for index, (step, model, user_column, extra_column) in enumerate(STEPS[start_step:], start=start_step):
+        while True:
+            try:
+                values, last_id = delete_chunk(model, user_column, extra_column, user_id, after_id, chunk_size)
+            except IntegrityError:
+                # A child row slipped in after its step finished; the retry starts over from the first step.
+                redis.hset(checkpoint_key(user_id), mapping={'step': 0, 'after_id': 0})
+                raise
+            if last_id is None:
+                break
+            after_chunk(step, user_id, values)
+            after_id = last_id
+            redis.hset(checkpoint_key(user_id), mapping={'step': index, 'after_id': after_id})
+
+        logger.info("Account purge step done | user_id=%s | step=%s", user_id, step)
+        after_id = 0
+        redis.hset(checkpoint_key(user_id), mapping={'step': index + 1, 'after_id': 0})
+
+    # Only small relations (admin log, group links) are left for the collector now.
+    avatar = User.objects.filter(pk=user_id).values_list('avatar', flat=True).first()
+    User.objects.filter(pk=user_id).delete()
+    redis.delete(checkpoint_key(user_id), following_key(user_id), followers_key(user_id))
+    if avatar:
+        delete_media.delay([avatar])
+    logger.warning("Account purged | user_id=%s", user_id)
+    return True
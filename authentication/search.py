@@ -0,0 +1,104 @@
+import logging
+import unicodedata
+
+from django.db.models import Q
+from redis import RedisError
+
+from authentication.graph import filter_following
+from authentication.models import User
+from root.settings import redis, SEARCH_INDEX_KEY, SEARCH_CANDIDATES
+
+logger = logging.getLogger(__name__)
+
+# Separates the indexed term from the user id inside a sorted-set member; sorts before any text.
+SEPARATOR = '\x00'
+
+
+def normalize(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.lower().split())
+
+
+def terms_for(username, first_name, last_name):
+    terms = {normalize(username), normalize(first_name), normalize(last_name),
+             normalize(f"{first_name} {last_name}")}
+    terms.discard('')
+    return terms
+
+
+def members_for(user_id, username, first_name, last_name):
+    return {f"{term}{SEPARATOR}{user_id}" for term in terms_for(username, first_name, last_name)}
+
+
+def terms_key(user_id):
+    return f"{SEARCH_INDEX_KEY}:terms:{user_id}"
+
+
+def index_user_search(user):
+    """Replace the user's entries in the prefix index; stale terms from earlier names are removed."""
+    members = members_for(user.id, user.username, user.first_name, user.last_name)
+    try:
+        stale = redis.smembers(terms_key(user.id)) - members
+        pipe = redis.pipeline()
+        if stale:
+            pipe.zrem(SEARCH_INDEX_KEY, *stale)
+        pipe.zadd(SEARCH_INDEX_KEY, {member: 0 for member in members})
+        pipe.delete(terms_key(user.id))
+        pipe.sadd(terms_key(user.id), *members)
+        pipe.execute()
+    except RedisError:
+        logger.warning("Search index update failed | user_id=%s", user.id)
+
+
+def remove_user_search(user_id):
+    try:
+        members = redis.smembers(terms_key(user_id))
+        pipe = redis.pipeline()
+        if members:
+            pipe.zrem(SEARCH_INDEX_KEY, *members)
+        pipe.delete(terms_key(user_id))
+        pipe.execute()
+    except RedisError:
+        logger.warning("Search index removal failed | user_id=%s", user_id)
+
+
+def search_users_in_db(query, limit):
+    """Plain prefix match on username and names, used while the Redis index is unreachable."""
+    query = query.strip()
+    matches = User.active.filter(
+        Q(username__istartswith=query) | Q(first_name__istartswith=query) | Q(last_name__istartswith=query)
+    )
+    return list(matches.only('id', 'username', 'avatar').order_by('username')[:limit])
+
+
+def search_users(query, viewer_id, limit=10):
+    """
+    Return up to `limit` users whose username or name starts with `query`.
+    Exact matches rank first, then users the viewer follows, then the remaining prefix matches.
+    """
+    prefix = normalize(query).encode()
+    if not prefix:
+        return []
+
+    try:
+        members = redis.zrangebylex(SEARCH_INDEX_KEY, b'[' + prefix, b'[' + prefix + b'\xff',
+                                    start=0, num=SEARCH_CANDIDATES)
+    except RedisError:
+        logger.warning("Search index unavailable, falling back to the database | viewer_id=%s", viewer_id)
+        return search_users_in_db(query, limit)
+
+    exact = {}
+    for member in members:
+        term, user_id = member.rsplit(SEPARATOR, 1)
+        user_id = int(user_id)
+        exact[user_id] = exact.get(user_id, False) or term.encode() == prefix
+
+    if not exact:
+        return []
+
+    followed = filter_following(viewer_id, exact)
+    ranked = sorted(exact, key=lambda user_id: (not exact[user_id], user_id not in followed, user_id))[:limit]
+
+    users = User.active.only('id', 'username', 'avatar').in_bulk(ranked)
+    return [users[user_id] for user_id in ranked if user_id in users]
@@ -1,21 +1,25 @@
-import json
 import logging
 import re
 
-from django.contrib.auth.hashers import make_password
 from django.core.validators import validate_email, RegexValidator
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import CharField, ReadOnlyField, SerializerMethodField
+from rest_framework.fields import CharField, ReadOnlyField, SerializerMethodField, EmailField, ListField, \
+    IntegerField
 from rest_framework.serializers import ModelSerializer, Serializer
 
+from app.tasks import delete_media
+from authentication.availability import is_username_taken, is_email_taken
+from authentication.graph import is_following
 from authentication.models import User, Follow
-from root.settings import redis
+from core.mixins import SparseFieldsetMixin
+from root.settings import BULK_LOOKUP_MAX
+from core.hashing import hash_password
 
 logger = logging.getLogger(__name__)
 
 
-class UserModelSerializer(ModelSerializer):
+class UserModelSerializer(SparseFieldsetMixin, ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'first_name', 'last_name', 'username', 'email', 'password', 'bio',)
@@ -27,7 +31,7 @@ class UserModelSerializer(ModelSerializer):
         except ValidationError:
             raise ValidationError(_('Email must be valid!'))
 
-        if User.objects.filter(email=value).exists():
+        if is_email_taken(value):
             logger.warning("Registration failed: email already registered | email=%s", value)
             raise ValidationError(_('Email already registered!'))
 
@@ -49,7 +53,7 @@ class UserModelSerializer(ModelSerializer):
         if value.lower() in reserved:
             logger.warning("Reserved username attempt | username=%s", value)
             raise ValidationError(_('This username is not valid!'))
-        if User.objects.filter(username=value).exists():
+        if is_username_taken(value):
             logger.warning("Username already taken | username=%s", value)
             raise ValidationError(_('This username is already taken!'))
 
@@ -67,10 +71,10 @@ class UserModelSerializer(ModelSerializer):
                   "and one special character.")
             )
 
-        return make_password(value)
+        return hash_password(value)
 
 
-class UserProfileSerializer(ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, ModelSerializer):
     followers_count = ReadOnlyField()
     following_count = ReadOnlyField()
     posts_count = ReadOnlyField()
@@ -85,14 +89,11 @@ class UserProfileSerializer(ModelSerializer):
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return Follow.objects.filter(
-                follower=request.user,
-                following=obj
-            ).exists()
+            return is_following(request.user.id, obj.id)
         return False
 
 
-class UserProfileSecondSerializer(ModelSerializer):
+class UserProfileSecondSerializer(SparseFieldsetMixin, ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'avatar',)
@@ -100,25 +101,14 @@ class UserProfileSecondSerializer(ModelSerializer):
 
 
 class VerifyCodeSerializer(Serializer):
+    email = EmailField()
     code = CharField(
         max_length=6,
         validators=[RegexValidator(r'^\d{6}$', _('Code must be 6 digits.'))]
     )
 
-    def validate_code(self, value):
-        redis_key = f"verify:{value}"
-        data = redis.get(redis_key)
 
-        if not data:
-            logger.warning("Invalid or expired verification code used | code=%s", value)
-            raise ValidationError(_('Invalid or expired code!'))
-
-        user_data = json.loads(data)
-        self.context['user_data'] = user_data
-        return value
-
-
-class UserUpdateModelSerializer(ModelSerializer):
+class UserUpdateModelSerializer(SparseFieldsetMixin, ModelSerializer):
     avatar_url = SerializerMethodField()
 
     class Meta:
@@ -147,7 +137,7 @@ class UserUpdateModelSerializer(ModelSerializer):
             raise ValidationError(_('This username is not valid!'))
 
         user = self.instance
-        if User.objects.exclude(id=user.id).filter(username=value).exists():
+        if is_username_taken(value, exclude_id=user.id):
             logger.warning(
                 "Username conflict during update | user_id=%s | username=%s",
                 user.id,
@@ -158,9 +148,12 @@ class UserUpdateModelSerializer(ModelSerializer):
         return value
 
     def update(self, instance, validated_data):
-        if 'avatar' in validated_data and instance.avatar:
-            instance.avatar.delete(save=False)
-        return super().update(instance, validated_data)
+        old_avatar = instance.avatar.name if 'avatar' in validated_data and instance.avatar else None
+        instance = super().update(instance, validated_data)
+        if old_avatar:
+            # Storage errors now propagate; the retried task keeps them out of the profile update.
+            delete_media.delay([old_avatar])
+        return instance
 
     def get_avatar_url(self, obj):
         if obj.avatar:
@@ -168,17 +161,30 @@ class UserUpdateModelSerializer(ModelSerializer):
         return None
 
 
-class FollowModelSerializer(ModelSerializer):
+class FollowModelSerializer(SparseFieldsetMixin, ModelSerializer):
     follower = UserProfileSecondSerializer(read_only=True)
     following = UserProfileSecondSerializer(read_only=True)
 
     class Meta:
         model = Follow
         fields = ('id', 'follower', 'following', 'created_at')
+        expandable_fields = ('follower', 'following')
         read_only_fields = ('id', 'follower', 'following', 'created_at')
 
 
-class PublicUserSerializer(ModelSerializer):
+class FollowListUserSerializer(SparseFieldsetMixin, ModelSerializer):
+    is_following = SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'avatar', 'is_following')
+        read_only_fields = fields
+
+    def get_is_following(self, obj):
+        return obj.id in self.context.get('following_ids', ())
+
+
+class PublicUserSerializer(SparseFieldsetMixin, ModelSerializer):
     followers_count = ReadOnlyField()
     following_count = ReadOnlyField()
     posts_count = ReadOnlyField()
@@ -201,14 +207,33 @@ class PublicUserSerializer(ModelSerializer):
     def get_is_following(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return Follow.objects.filter(
-                follower=request.user,
-                following=obj
-            ).exists()
+            return is_following(request.user.id, obj.id)
         return False
 
 
-class UserLanguageSerializer(ModelSerializer):
+class AvailabilitySerializer(Serializer):
+    username = CharField(required=False, max_length=150)
+    email = EmailField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise ValidationError(_('Provide a username or an email to check.'))
+        return attrs
+
+
+class RelationshipLookupSerializer(Serializer):
+    ids = ListField(child=IntegerField(), required=False, max_length=BULK_LOOKUP_MAX)
+    usernames = ListField(child=CharField(max_length=150), required=False, max_length=BULK_LOOKUP_MAX)
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('usernames'):
+            raise ValidationError(_('Provide a list of user ids or usernames.'))
+        if attrs.get('ids') and attrs.get('usernames'):
+            raise ValidationError(_('Provide either user ids or usernames, not both.'))
+        return attrs
+
+
+class UserLanguageSerializer(SparseFieldsetMixin, ModelSerializer):
     class Meta:
         model = User
         fields = ('language',)
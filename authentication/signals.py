@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from authentication.availability import index_user
+from authentication.cache import invalidate_user_snapshot
+from authentication.models import User
+from authentication.search import index_user_search, remove_user_search
+
+INDEXED_FIELDS = {'username', 'email'}
+SEARCH_FIELDS = {'username', 'first_name', 'last_name', 'is_active', 'is_deleted', 'deleted_at'}
+
+
+@receiver(post_save, sender=User)
+def index_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    # Covers admin, createsuperuser and shell edits as well as the API.
+    if created or update_fields is None or INDEXED_FIELDS & set(update_fields):
+        transaction.on_commit(lambda: index_user(instance))
+
+
+@receiver(post_save, sender=User)
+def search_index_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    if not (created or update_fields is None or SEARCH_FIELDS & set(update_fields)):
+        return
+    if instance.is_deleted or not instance.is_active:
+        user_id = instance.id
+        transaction.on_commit(lambda: remove_user_search(user_id))
+    else:
+        transaction.on_commit(lambda: index_user_search(instance))
+
+
+@receiver(post_delete, sender=User)
+def search_unindex_deleted_user(sender, instance, **kwargs):
+    user_id = instance.id
+    transaction.on_commit(lambda: remove_user_search(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_saved_user(sender, instance, **kwargs):
+    # Admin bans (is_active, is_staff) must reach CachedJWTAuthentication without waiting for the TTL.
+    # Queryset .update() calls bypass signals and invalidate explicitly.
+    user_id = instance.id
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
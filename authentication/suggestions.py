@@ -0,0 +1,71 @@
+import logging
+
+from django.db.models import Count
+from redis import RedisError
+
+from authentication.models import Follow
+from root.settings import redis, SUGGESTIONS_TOP_K, SUGGESTIONS_TTL
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = 'suggestions:dirty'
+
+
+def suggestions_key(user_id):
+    return f"suggestions:{user_id}"
+
+
+def compute_suggestions(user_id, limit=SUGGESTIONS_TOP_K):
+    """
+    Return `(candidate_id, mutual_count)` pairs for accounts followed by the people `user_id`
+    follows, excluding the user and anyone they already follow. One grouped query on the
+    follow table's (follower, following) index.
+    """
+    following_ids = Follow.objects.filter(follower_id=user_id).values('following_id')
+    return list(
+        Follow.objects.filter(follower_id__in=following_ids)
+        .exclude(following_id__in=following_ids)
+        .exclude(following_id=user_id)
+        .values('following_id')
+        .annotate(mutual=Count('id'))
+        .order_by('-mutual', '-following_id')
+        .values_list('following_id', 'mutual')[:limit]
+    )
+
+
+def store_suggestions(user_id, candidates):
+    key = suggestions_key(user_id)
+    pipe = redis.pipeline()
+    pipe.delete(key)
+    if candidates:
+        pipe.zadd(key, {candidate_id: mutual for candidate_id, mutual in candidates})
+    else:
+        # Remember that the user has no second-degree candidates so the endpoint does not recompute.
+        pipe.zadd(key, {0: 0})
+    pipe.expire(key, SUGGESTIONS_TTL)
+    pipe.execute()
+
+
+def refresh_suggestions_for(user_ids):
+    for user_id in user_ids:
+        store_suggestions(user_id, compute_suggestions(user_id))
+
+
+def get_suggested_ids(user_id, limit):
+    """Return precomputed candidate ids best-first, or None when nothing is cached for the user."""
+    try:
+        ids = redis.zrevrange(suggestions_key(user_id), 0, limit - 1)
+    except RedisError:
+        logger.warning("Suggestions cache unavailable | user_id=%s", user_id)
+        return None
+    if not ids:
+        return None
+    return [int(candidate_id) for candidate_id in ids if candidate_id != '0']
+
+
+def mark_graph_changed(user_id):
+    """Queue a user whose following list changed for the next incremental refresh."""
+    try:
+        redis.sadd(DIRTY_KEY, user_id)
+    except RedisError:
+        logger.warning("Suggestions dirty mark failed | user_id=%s", user_id)
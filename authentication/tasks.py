@@ -1,24 +1,217 @@
+import json
+import logging
+from datetime import datetime
+from functools import cache
+from smtplib import SMTPException, SMTPRecipientsRefused
+
 from celery import shared_task
-from django.conf.global_settings import EMAIL_HOST_USER
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, EmailMessage, get_connection
+from django.db import IntegrityError
+from django.template.loader import get_template
+from redis import ResponseError
 
+from authentication.export import export_user, export_status
+from authentication.graph import check_consistency
+from authentication.models import User
+from authentication.purge import purge_user, purge_candidates
+from authentication.suggestions import DIRTY_KEY, refresh_suggestions_for
+from root.settings import redis, EMAIL_HOST_USER, EMAIL_OUTBOX_KEY, EMAIL_BATCH_SIZE, LAST_LOGIN_KEY, \
+    SUGGESTIONS_REFRESH_BATCH, ACCOUNT_PURGE_BATCH, EXPORT_URL_TTL, EXPORT_LOCK_TTL
+
+logger = logging.getLogger(__name__)
+
+_connection = None
+
+
+@cache
+def verification_template():
+    return get_template('verification_email.html')
 
-@shared_task
-def send_code_email(user_email: dict, code):
-    subject = 'Email Verification'
-    from_email = EMAIL_HOST_USER
-    to_email = [user_email.get('email')]
-    print('Sending email to {}'.format(to_email))
 
+def get_smtp_connection():
+    """Return this worker's SMTP connection, opening it on first use and keeping it open between batches."""
+    global _connection
+    if _connection is None:
+        _connection = get_connection()
+    _connection.open()
+    return _connection
+
+
+def reset_smtp_connection():
+    global _connection
+    if _connection is not None:
+        _connection.close()
+    _connection = None
+
+
+def build_code_email(email, code):
     context = {
         'code': code,
         'verify_url': f"https://localhost:8000/verify/{code}"
     }
-    print(context)
-    html_content = render_to_string('verification_email.html', context=context)
+    html_content = verification_template().render(context)
     text_content = f"Your verification code is {code}"
 
-    msg = EmailMultiAlternatives(subject, text_content, from_email, to_email)
+    msg = EmailMultiAlternatives('Email Verification', text_content, EMAIL_HOST_USER, [email])
     msg.attach_alternative(html_content, "text/html")
-    msg.send()
+    return msg
+
+
+def queue_code_email(email, code):
+    redis.rpush(EMAIL_OUTBOX_KEY, json.dumps({'email': email, 'code': code}))
+    flush_email_outbox.delay()
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    max_retries=5,
+)
+def flush_email_outbox(self):
+    raw_items = redis.lpop(EMAIL_OUTBOX_KEY, EMAIL_BATCH_SIZE)
+    if not raw_items:
+        return 0
+
+    sent = 0
+    try:
+        connection = get_smtp_connection()
+        for raw in raw_items:
+            item = json.loads(raw)
+            try:
+                connection.send_messages([build_code_email(item['email'], item['code'])])
+            except SMTPRecipientsRefused:
+                logger.warning("Verification email rejected | email=%s", item['email'])
+            sent += 1
+    except (SMTPException, OSError):
+        # Requeue whatever was not delivered so the retry picks it up in order.
+        unsent = raw_items[sent:]
+        if unsent:
+            redis.lpush(EMAIL_OUTBOX_KEY, *reversed(unsent))
+        reset_smtp_connection()
+        raise
+
+    logger.info("Verification emails sent | count=%s", sent)
+
+    if redis.llen(EMAIL_OUTBOX_KEY):
+        flush_email_outbox.delay()
+    return sent
+
+
+def record_last_login(user_id, when):
+    """Buffer a login timestamp; repeated logins before the next flush collapse into one field."""
+    redis.hset(LAST_LOGIN_KEY, user_id, when.isoformat())
+
+
+@shared_task
+def flush_last_logins(batch_size=500):
+    processing_key = f"{LAST_LOGIN_KEY}:flushing"
+
+    # A leftover processing hash means the previous flush died midway; finish it first.
+    if not redis.exists(processing_key):
+        try:
+            redis.rename(LAST_LOGIN_KEY, processing_key)
+        except ResponseError:
+            return 0
+
+    pending = redis.hgetall(processing_key)
+    users = [
+        User(id=int(user_id), last_login=datetime.fromisoformat(timestamp))
+        for user_id, timestamp in pending.items()
+    ]
+    User.objects.bulk_update(users, ['last_login'], batch_size=batch_size)
+    redis.delete(processing_key)
+
+    logger.info("Last logins flushed | count=%s", len(users))
+    return len(users)
+
+
+@shared_task
+def refresh_suggestions(user_id):
+    refresh_suggestions_for([user_id])
+
+
+@shared_task
+def refresh_dirty_suggestions():
+    """Recompute suggestions only for users whose following list changed since the last run."""
+    refreshed = 0
+    while user_ids := redis.spop(DIRTY_KEY, SUGGESTIONS_REFRESH_BATCH):
+        refresh_suggestions_for([int(user_id) for user_id in user_ids])
+        refreshed += len(user_ids)
+
+    logger.info("Suggestions refreshed | count=%s", refreshed)
+    return refreshed
+
+
+@shared_task
+def check_follow_graph(sample_size=200):
+    dropped = check_consistency(sample_size)
+    logger.info("Follow graph checked | dropped=%s", dropped)
+    return dropped
+
+
+@shared_task(autoretry_for=(IntegrityError,), retry_backoff=True, max_retries=5)
+def purge_user_account(user_id):
+    lock_key = f"purge:lock:{user_id}"
+    if not redis.set(lock_key, 1, nx=True, ex=60 * 60):
+        return False
+    try:
+        return purge_user(user_id)
+    finally:
+        redis.delete(lock_key)
+
+
+@shared_task
+def purge_deleted_accounts():
+    """Queue a purge for accounts that stayed deleted past the retention window."""
+    user_ids = purge_candidates(ACCOUNT_PURGE_BATCH)
+    for user_id in user_ids:
+        purge_user_account.delay(user_id)
+    return len(user_ids)
+
+
+@shared_task(
+    autoretry_for=(OSError,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def export_account(user_id, compress=True):
+    lock_key = f"export:lock:{user_id}"
+    if not redis.set(lock_key, 1, nx=True, ex=EXPORT_LOCK_TTL):
+        return None
+    try:
+        name = export_user(user_id, compress)
+    finally:
+        redis.delete(lock_key)
+
+    # Separate task: an SMTP failure must not rebuild and re-upload the archive.
+    send_export_email.delay(user_id)
+    return name
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(SMTPException, OSError),
+    retry_backoff=True,
+    retry_backoff_max=300,
+    max_retries=5,
+)
+def send_export_email(self, user_id):
+    email = User.objects.filter(pk=user_id).values_list('email', flat=True).first()
+    state = export_status(user_id)
+    if not email or not state or not state.get('url'):
+        return False
+
+    message = EmailMessage(
+        'Your data export is ready',
+        f"Your account export is ready. Download it within {EXPORT_URL_TTL // (60 * 60 * 24)} days:\n{state['url']}",
+        EMAIL_HOST_USER,
+        [email]
+    )
+    try:
+        get_smtp_connection().send_messages([message])
+    except (SMTPException, OSError):
+        reset_smtp_connection()
+        raise
+    return True
@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from authentication.follows import follow_user, unfollow_user
+from authentication.models import User, Follow
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        self.follower = User.objects.create(username='follower', email='follower@example.com')
+        self.target = User.objects.create(username='target', email='target@example.com')
+
+    def test_follow_is_idempotent(self):
+        self.assertEqual(follow_user(self.follower.id, 'target'), (self.target.id, True, 1, 1))
+        self.assertEqual(follow_user(self.follower.id, 'target'), (self.target.id, False, 1, 1))
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_unfollow_is_idempotent(self):
+        follow_user(self.follower.id, 'target')
+
+        self.assertEqual(unfollow_user(self.follower.id, 'target'), (self.target.id, True, 0, 0))
+        self.assertEqual(unfollow_user(self.follower.id, 'target'), (self.target.id, False, 0, 0))
+
+    def test_missing_target(self):
+        self.assertIsNone(follow_user(self.follower.id, 'nobody'))
+        self.assertIsNone(unfollow_user(self.follower.id, 'nobody'))
+
+    def test_deleted_target(self):
+        User.objects.filter(pk=self.target.id).update(is_deleted=True)
+
+        self.assertIsNone(follow_user(self.follower.id, 'target'))
+        self.assertFalse(Follow.objects.exists())
+        # Unfollowing a deleted account still succeeds so clients can clean up stale state.
+        self.assertEqual(unfollow_user(self.follower.id, 'target'), (self.target.id, False, 0, 0))
@@ -1,5 +1,6 @@
 from django.urls import path
 
+from authentication.async_views import UserProfileByUsernameAsyncView
 from authentication.views import (
     CustomTokenObtainPairView, CustomTokenRefreshView,
     UserGenericAPIView, VerifyEmailGenericAPIView,
@@ -9,11 +10,14 @@ from authentication.views import (
     UserPostsAPIView, FollowUserAPIView,
     UnfollowUserAPIView, UserFollowersAPIView,
     UserFollowingAPIView, UpdateLanguageAPIView,
+    AvailabilityAPIView, UserTypeaheadAPIView,
+    RelationshipStatusAPIView, UserExportAPIView,
 )
 
 urlpatterns = [
     path('auth/register/', UserGenericAPIView.as_view()),
     path('auth/verify-code/', VerifyEmailGenericAPIView.as_view()),
+    path('auth/availability/', AvailabilityAPIView.as_view()),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 ]
@@ -24,6 +28,7 @@ urlpatterns += [
     path('user/me/delete', UserDeleteAPIView.as_view()),
     path('users', UserListAPIView.as_view()),
     path('users/suggested', SuggestedUsersAPIView.as_view()),
+    path('users/typeahead', UserTypeaheadAPIView.as_view()),
     path('users/<str:username>/', UserProfileByUsernameAPIView.as_view()),
     path('users/<str:username>/posts/', UserPostsAPIView.as_view()),
 ]
@@ -33,8 +38,14 @@ urlpatterns += [
     path('users/<str:username>/unfollow/', UnfollowUserAPIView.as_view()),
     path('users/<str:username>/followers/', UserFollowersAPIView.as_view()),
     path('users/<str:username>/following/', UserFollowingAPIView.as_view()),
+    path('users/relationships', RelationshipStatusAPIView.as_view()),
 ]
 
 urlpatterns += [
     path('user/me/language/', UpdateLanguageAPIView.as_view()),
+    path('user/me/export', UserExportAPIView.as_view()),
+]
+
+urlpatterns += [
+    path('async/users/<str:username>/', UserProfileByUsernameAsyncView.as_view()),
 ]
@@ -0,0 +1,80 @@
+import hashlib
+import hmac
+import json
+import secrets
+
+from root.settings import redis, SECRET_KEY, VERIFICATION_CODE_TTL, VERIFICATION_RESEND_COOLDOWN, \
+    VERIFICATION_MAX_ATTEMPTS
+
+# KEYS - pending hash, cooldown key. ARGV - code digest, payload, ttl, cooldown.
+# Replaces any earlier pending signup for the email; returns seconds left if still cooling down.
+STORE_SCRIPT = """
+if not redis.call('SET', KEYS[2], '1', 'NX', 'EX', ARGV[4]) then
+    return math.max(redis.call('TTL', KEYS[2]), 1)
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code:' .. ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 0
+"""
+
+# KEYS - pending hash. ARGV - code digest, max attempts.
+# Returns the payload and deletes the entry on a match; wrong guesses are counted and
+# the entry is dropped once they reach the limit.
+CONSUME_SCRIPT = """
+local data = redis.call('HGET', KEYS[1], 'code:' .. ARGV[1])
+if data then
+    redis.call('DEL', KEYS[1])
+    return data
+end
+if redis.call('EXISTS', KEYS[1]) == 1 and redis.call('HINCRBY', KEYS[1], 'attempts', 1) >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+end
+return false
+"""
+
+store_script = redis.register_script(STORE_SCRIPT)
+consume_script = redis.register_script(CONSUME_SCRIPT)
+
+
+def generate_code():
+    return f"{secrets.randbelow(10 ** 6):06d}"
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def code_digest(email, code):
+    message = f"{normalize_email(email)}:{code}".encode()
+    return hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def pending_key(email):
+    return f"verify:{normalize_email(email)}"
+
+
+def cooldown_key(email):
+    return f"verify:cooldown:{normalize_email(email)}"
+
+
+def store_pending_registration(email, code, user_data):
+    """
+    Save a pending signup under its email, replacing any earlier one.
+    Returns 0 on success or the number of seconds until a new code may be requested.
+    """
+    return store_script(
+        keys=[pending_key(email), cooldown_key(email)],
+        args=[code_digest(email, code), json.dumps(user_data), VERIFICATION_CODE_TTL, VERIFICATION_RESEND_COOLDOWN]
+    )
+
+
+def consume_pending_registration(email, code):
+    """Atomically fetch and delete the pending signup matching `email` and `code`, or return None."""
+    raw = consume_script(
+        keys=[pending_key(email)],
+        args=[code_digest(email, code), VERIFICATION_MAX_ATTEMPTS]
+    )
+    if not raw:
+        return None
+    return json.loads(raw)
@@ -1,13 +1,11 @@
-import json
 import logging
-import random
 from http import HTTPStatus
 
-from django.db import transaction
-from django.db.models import Q
+from django.db import transaction, IntegrityError
+from django.db.models import Q, Exists, OuterRef
 from django.utils import timezone
-from django.utils.translation import gettext as _
-from drf_spectacular.utils import extend_schema
+from django.utils.translation import gettext as _, gettext_lazy
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import GenericAPIView, UpdateAPIView, RetrieveAPIView, DestroyAPIView, ListAPIView, \
@@ -19,18 +17,28 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from app.models import Post
 from app.serializers import PostModelSerializer
+from authentication.availability import is_username_taken, is_email_taken
 from authentication.error_codes import ErrorCode
+from authentication.export import mark_export_queued, export_status
+from authentication.follows import follow_user, unfollow_user
+from authentication.graph import record_follow, record_unfollow, filter_following
 from authentication.models import Follow
-from authentication.models import User
+from authentication.models import User, followed_by
 from authentication.permissions import IsActiveUser
+from authentication.search import search_users
 from authentication.serializers import UserModelSerializer, VerifyCodeSerializer, UserUpdateModelSerializer, \
-    UserProfileSerializer, FollowModelSerializer, PublicUserSerializer, UserProfileSecondSerializer, \
-    UserLanguageSerializer
-from authentication.tasks import send_code_email
-from core.functions import api_response
+    UserProfileSerializer, PublicUserSerializer, UserProfileSecondSerializer, \
+    UserLanguageSerializer, AvailabilitySerializer, FollowListUserSerializer, RelationshipLookupSerializer
+from authentication.suggestions import get_suggested_ids, mark_graph_changed
+from authentication.tasks import queue_code_email, record_last_login, refresh_suggestions, export_account
+from authentication.verification import generate_code, store_pending_registration, consume_pending_registration
+from core.conditional import ConditionalGetMixin, bump_version
+from core.functions import api_response, streaming_api_response
 from core.mixins import LanguageMixin
+from core.pagination import KeysetPagination
+from core.throttling import IPScopedRateThrottle
 from core.utils import RequestLoggingMiddleware
-from root.settings import redis
+from root.settings import SUGGESTIONS_TOP_K
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +49,8 @@ class UserGenericAPIView(LanguageMixin, GenericAPIView):
     serializer_class = UserModelSerializer
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_classes = [IPScopedRateThrottle]
+    throttle_scope = 'register'
 
     def post(self, request):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -55,10 +65,25 @@ class UserGenericAPIView(LanguageMixin, GenericAPIView):
         serializer.is_valid(raise_exception=True)
 
         user_data = serializer.validated_data
-        code = str(random.randrange(10 ** 5, 10 ** 6))
-        redis_key = f"verify:{code}"
-        send_code_email.delay(user_data, code)
-        redis.setex(redis_key, 300, json.dumps(user_data))
+        code = generate_code()
+        retry_after = store_pending_registration(user_data['email'], code, user_data)
+
+        if retry_after:
+            logger.warning(
+                "Verification code resend too soon | ip=%s | email=%s",
+                ip,
+                user_data['email']
+            )
+            return api_response(
+                success=False,
+                error_code=ErrorCode.VERIFICATION_RESEND_COOLDOWN,
+                message=_("Please wait %(seconds)s seconds before requesting a new code.") % {
+                    "seconds": retry_after
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        queue_code_email(user_data['email'], code)
         return api_response(
             success=True,
             message=_("Verification code sent successfully"),
@@ -71,20 +96,22 @@ class UserGenericAPIView(LanguageMixin, GenericAPIView):
 class VerifyEmailGenericAPIView(LanguageMixin, GenericAPIView):
     serializer_class = VerifyCodeSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [IPScopedRateThrottle]
+    throttle_scope = 'verify'
 
     def post(self, request):
         ip = RequestLoggingMiddleware.get_client_ip(request)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        email = serializer.validated_data.get("email")
         code = serializer.validated_data.get("code")
-        redis_key = f"verify:{code}"
-        raw_data = redis.get(redis_key)
+        user_data = consume_pending_registration(email, code)
 
-        if not raw_data:
+        if user_data is None:
             logger.warning(
-                "Email verification failed | ip=%s | code=%s",
+                "Email verification failed | ip=%s | email=%s",
                 ip,
-                code
+                email
             )
             return api_response(
                 success=False,
@@ -93,11 +120,22 @@ class VerifyEmailGenericAPIView(LanguageMixin, GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        user_data = json.loads(raw_data)
-
-        with transaction.atomic():
-            user = User.objects.create(**user_data)
-            redis.delete(redis_key)
+        try:
+            with transaction.atomic():
+                user = User.objects.create(**user_data)
+        except IntegrityError:
+            # Another signup claimed the username or email after this one was requested.
+            logger.warning(
+                "Email verification failed: account already exists | ip=%s | email=%s",
+                ip,
+                email
+            )
+            return api_response(
+                success=False,
+                error_code=ErrorCode.USERNAME_TAKEN,
+                message=_("This username or email has already been taken. Please register again."),
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         logger.info(
             "Email verified successfully | user_id=%s | ip=%s",
@@ -113,9 +151,35 @@ class VerifyEmailGenericAPIView(LanguageMixin, GenericAPIView):
         )
 
 
+@extend_schema(tags=['auth'], parameters=[AvailabilitySerializer])
+class AvailabilityAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = AvailabilitySerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [IPScopedRateThrottle]
+    throttle_scope = 'availability'
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        data = {}
+        if username := serializer.validated_data.get('username'):
+            data['username'] = not is_username_taken(username)
+        if email := serializer.validated_data.get('email'):
+            data['email'] = not is_email_taken(email)
+
+        return api_response(
+            success=True,
+            message=_("Availability checked successfully"),
+            data=data
+        )
+
+
 @extend_schema(tags=['auth'])
 class CustomTokenObtainPairView(LanguageMixin, TokenObtainPairView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPScopedRateThrottle]
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -124,13 +188,15 @@ class CustomTokenObtainPairView(LanguageMixin, TokenObtainPairView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.user
+        now = timezone.now()
 
         if user.is_deleted:
             user.is_deleted = False
             user.deleted_at = None
-
-        user.last_login = timezone.now()
-        user.save(update_fields=['is_deleted', 'deleted_at', 'last_login'])
+            user.last_login = now
+            user.save(update_fields=['is_deleted', 'deleted_at', 'last_login'])
+        else:
+            record_last_login(user.id, now)
 
         logger.info(
             "Login successful | user_id=%s | ip=%s",
@@ -167,7 +233,7 @@ class UserUpdateAPIView(LanguageMixin, UpdateAPIView):
     permission_classes = [IsActiveUser]
 
     def get_object(self):
-        return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -218,14 +284,18 @@ class UserDeleteAPIView(LanguageMixin, DestroyAPIView):
 
 
 @extend_schema(tags=['profile'])
-class UserDetailAPIView(LanguageMixin, RetrieveAPIView):
+class UserDetailAPIView(LanguageMixin, ConditionalGetMixin, RetrieveAPIView):
     queryset = User.objects.all()
     lookup_field = 'pk'
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
+    def get_validator_parts(self, request, *args, **kwargs):
+        updated_at = User.objects.filter(pk=request.user.pk).values_list('updated_at', flat=True).first()
+        return ('user', request.user.pk, updated_at), 'user', request.user.pk
+
     def get_object(self):
-        return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
     def retrieve(self, request, *args, **kwargs):
         logger.debug(
@@ -243,7 +313,7 @@ class UserDetailAPIView(LanguageMixin, RetrieveAPIView):
 
 @extend_schema(tags=['user'])
 class UserListAPIView(LanguageMixin, ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.active.all()
     serializer_class = UserProfileSecondSerializer
     filter_backends = [SearchFilter]
     search_fields = ['username', 'first_name', 'last_name']
@@ -262,7 +332,30 @@ class UserListAPIView(LanguageMixin, ListAPIView):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
+        return streaming_api_response(
+            message=_("Users retrieved successfully"),
+            queryset=queryset,
+            serializer=self.get_serializer()
+        )
+
+
+@extend_schema(tags=['user'], parameters=[
+    OpenApiParameter('q', str, description="Username or name prefix"),
+    OpenApiParameter('limit', int, description="Maximum results, 1-20"),
+])
+class UserTypeaheadAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = UserProfileSecondSerializer
+    permission_classes = [IsAuthenticated, IsActiveUser]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 20)
+        except ValueError:
+            limit = 10
+
+        users = search_users(query, request.user.id, limit=limit)
+        serializer = self.get_serializer(users, many=True)
         return api_response(
             success=True,
             message=_("Users retrieved successfully"),
@@ -271,12 +364,19 @@ class UserListAPIView(LanguageMixin, ListAPIView):
 
 
 @extend_schema(tags=['user'])
-class UserProfileByUsernameAPIView(LanguageMixin, RetrieveAPIView):
+class UserProfileByUsernameAPIView(LanguageMixin, ConditionalGetMixin, RetrieveAPIView):
     queryset = User.objects.all()
     lookup_field = 'username'
     serializer_class = PublicUserSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
+    def get_validator_parts(self, request, *args, **kwargs):
+        row = User.objects.filter(username=kwargs['username']).values_list('id', 'updated_at').first()
+        if row is None:
+            return None
+        user_id, updated_at = row
+        return ('user', user_id, updated_at), 'user', user_id
+
     def get_object(self):
         return get_object_or_404(User, username=self.kwargs['username'])
 
@@ -297,16 +397,28 @@ class UserProfileByUsernameAPIView(LanguageMixin, RetrieveAPIView):
 
 @extend_schema(tags=['user'])
 class SuggestedUsersAPIView(LanguageMixin, ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.active.all()
     serializer_class = UserProfileSecondSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
+    limit = 10
 
     def get_queryset(self):
         user = self.request.user
-        following_ids = Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-        return User.objects.exclude(
-            Q(id=user.id) | Q(id__in=following_ids)
-        ).order_by('-date_joined')[:10]
+        # The stored list may predate the viewer's latest follows; read all of it and let SQL drop
+        # the followed accounts before the page is cut, so recent follows do not shrink it.
+        candidates = User.active.exclude(Q(id=user.id) | Q(id__in=followed_by(user.id)))
+        suggested_ids = get_suggested_ids(user.id, SUGGESTIONS_TOP_K)
+
+        if suggested_ids is None:
+            refresh_suggestions.delay(user.id)
+        elif suggested_ids:
+            users = candidates.in_bulk(suggested_ids)
+            suggested = [users[user_id] for user_id in suggested_ids if user_id in users][:self.limit]
+            if suggested:
+                return suggested
+
+        # Cold start: no follow graph to walk yet, fall back to the newest accounts.
+        return candidates.order_by('-date_joined')[:self.limit]
 
     def list(self, request, *args, **kwargs):
         logger.debug(
@@ -328,8 +440,9 @@ class UserPostsAPIView(LanguageMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsActiveUser]
 
     def get_queryset(self):
-        user = get_object_or_404(User, username=self.kwargs["username"])
-        return Post.objects.filter(user=user).order_by("-created_at")
+        user = get_object_or_404(User.active, username=self.kwargs["username"])
+        queryset = Post.objects.visible().filter(user=user).order_by("-created_at")
+        return self.get_serializer_class().prepare_queryset(queryset, self.request)
 
     def list(self, request, *args, **kwargs):
         logger.debug(
@@ -338,11 +451,10 @@ class UserPostsAPIView(LanguageMixin, ListAPIView):
             self.kwargs["username"]
         )
 
-        serializer = self.get_serializer(self.get_queryset(), many=True)
-        return api_response(
-            success=True,
+        return streaming_api_response(
             message=_("User posts retrieved successfully"),
-            data=serializer.data
+            queryset=self.get_queryset(),
+            serializer=self.get_serializer()
         )
 
 
@@ -350,27 +462,12 @@ class UserPostsAPIView(LanguageMixin, ListAPIView):
 @extend_schema(tags=['follow/unfollow'])
 class FollowUserAPIView(LanguageMixin, APIView):
     permission_classes = [IsActiveUser]
+    throttle_scope = 'follows'
 
     def post(self, request, username):
         ip = RequestLoggingMiddleware.get_client_ip(request)
 
-        try:
-            user_to_follow = User.objects.get(username=username)
-        except User.DoesNotExist:
-            logger.warning(
-                "Follow failed: user not found | follower=%s | target=%s | ip=%s",
-                request.user.id,
-                username,
-                ip
-            )
-            return api_response(
-                success=False,
-                error_code=ErrorCode.USER_NOT_FOUND,
-                message=_("User not found"),
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-        if user_to_follow == request.user:
+        if username == request.user.username:
             logger.warning(
                 "Follow failed: self-follow attempt | user_id=%s | ip=%s",
                 request.user.id,
@@ -383,49 +480,56 @@ class FollowUserAPIView(LanguageMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        follow, created = Follow.objects.get_or_create(
-            follower=request.user,
-            following=user_to_follow
-        )
-
-        if not created:
+        result = follow_user(request.user.id, username)
+        if result is None:
             logger.warning(
-                "Follow already exists | follower=%s | following=%s | ip=%s",
+                "Follow failed: user not found | follower=%s | target=%s | ip=%s",
                 request.user.id,
-                user_to_follow.id,
+                username,
                 ip
             )
             return api_response(
                 success=False,
-                error_code=ErrorCode.ALREADY_FOLLOWED,
-                message=_('Follow already created'),
-                status=status.HTTP_400_BAD_REQUEST
+                error_code=ErrorCode.USER_NOT_FOUND,
+                message=_("User not found"),
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        target_id, created, followers_count, following_count = result
+        if created:
+            record_follow(request.user.id, target_id)
+            bump_version('user', request.user.id, target_id)
+            mark_graph_changed(request.user.id)
+            logger.info(
+                "User followed | follower=%s | following=%s | ip=%s",
+                request.user.id,
+                target_id,
+                ip
             )
-        logger.info(
-            "User followed | follower=%s | following=%s | ip=%s",
-            request.user.id,
-            user_to_follow.id,
-            ip
-        )
         return api_response(
             success=True,
             message=_("You are now following %(username)s") % {
-                "username": user_to_follow.username
+                "username": username
+            },
+            data={
+                'is_following': True,
+                'followers_count': followers_count,
+                'following_count': following_count,
             },
-            status=status.HTTP_201_CREATED
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
 
 @extend_schema(tags=['follow/unfollow'])
 class UnfollowUserAPIView(LanguageMixin, APIView):
     permission_classes = [IsActiveUser]
+    throttle_scope = 'follows'
 
     def post(self, request, username):
         ip = RequestLoggingMiddleware.get_client_ip(request)
 
-        try:
-            user_to_unfollow = User.objects.get(username=username)
-        except User.DoesNotExist:
+        result = unfollow_user(request.user.id, username)
+        if result is None:
             logger.warning(
                 "Unfollow failed: user not found | follower=%s | target=%s | ip=%s",
                 request.user.id,
@@ -439,66 +543,103 @@ class UnfollowUserAPIView(LanguageMixin, APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        try:
-            follow = Follow.objects.get(follower=request.user, following=user_to_unfollow)
-            follow.delete()
+        target_id, deleted, followers_count, following_count = result
+        if deleted:
+            record_unfollow(request.user.id, target_id)
+            bump_version('user', request.user.id, target_id)
+            mark_graph_changed(request.user.id)
             logger.info(
                 "User unfollowed | follower=%s | following=%s | ip=%s",
                 request.user.id,
-                user_to_unfollow.id,
-                ip
-            )
-            return api_response(
-                success=True,
-                message=_("You have unfollowed %(username)s") % {
-                    "username": user_to_unfollow.username
-                },
-                data=None
-            )
-        except Follow.DoesNotExist:
-            logger.warning(
-                "Unfollow failed: relationship not found | follower=%s | target=%s | ip=%s",
-                request.user.id,
-                username,
+                target_id,
                 ip
             )
-            return api_response(
-                success=False,
-                error_code=ErrorCode.NOT_FOLLOWING,
-                message=_("You are not following this user"),
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return api_response(
+            success=True,
+            message=_("You have unfollowed %(username)s") % {
+                "username": username
+            },
+            data={
+                'is_following': False,
+                'followers_count': followers_count,
+                'following_count': following_count,
+            }
+        )
 
 
-@extend_schema(tags=['profile'])
-class UserFollowersAPIView(LanguageMixin, APIView):
+class FollowListAPIView(LanguageMixin, APIView):
+    """Keyset-paginated list of the accounts on one side of a user's follow relationships."""
     permission_classes = [IsAuthenticated, IsActiveUser]
+    pagination_class = KeysetPagination
+    # Follow field holding the profile owner, and the one holding the listed accounts.
+    owner_field = None
+    listed_field = None
+    success_message = None
 
     def get(self, request, username):
         user = get_object_or_404(User, username=username)
-        followers = Follow.objects.filter(following=user)
-        serializer = FollowModelSerializer(followers, many=True)
-
+        queryset = Follow.objects.filter(**{
+            self.owner_field: user,
+            f"{self.listed_field}__is_deleted": False,
+        }).select_related(self.listed_field)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        users = [getattr(follow, self.listed_field) for follow in page]
+
+        serializer = FollowListUserSerializer(users, many=True, context={
+            'request': request,
+            'following_ids': filter_following(request.user.id, [item.id for item in users]),
+        })
         return api_response(
             success=True,
-            message=_("Followers retrieved successfully"),
-            data=serializer.data
+            message=self.success_message,
+            data=paginator.get_page_data(serializer.data)
         )
 
 
 @extend_schema(tags=['profile'])
-class UserFollowingAPIView(LanguageMixin, APIView):
+class UserFollowersAPIView(FollowListAPIView):
+    owner_field = 'following'
+    listed_field = 'follower'
+    success_message = gettext_lazy("Followers retrieved successfully")
+
+
+@extend_schema(tags=['profile'])
+class UserFollowingAPIView(FollowListAPIView):
+    owner_field = 'follower'
+    listed_field = 'following'
+    success_message = gettext_lazy("Following list retrieved successfully")
+
+
+@extend_schema(tags=['follow/unfollow'])
+class RelationshipStatusAPIView(LanguageMixin, GenericAPIView):
+    serializer_class = RelationshipLookupSerializer
     permission_classes = [IsAuthenticated, IsActiveUser]
 
-    def get(self, request, username):
-        user = get_object_or_404(User, username=username)
-        following = Follow.objects.filter(follower=user)
-        serializer = FollowModelSerializer(following, many=True)
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        ids = serializer.validated_data.get('ids')
+        usernames = serializer.validated_data.get('usernames')
+        viewer = request.user
+
+        users = User.objects.filter(
+            Q(id__in=ids) if ids else Q(username__in=usernames)
+        ).annotate(
+            is_following=Exists(Follow.objects.filter(follower=viewer, following=OuterRef('pk'))),
+            is_followed_by=Exists(Follow.objects.filter(follower=OuterRef('pk'), following=viewer)),
+        ).values('id', 'username', 'is_following', 'is_followed_by')
+
+        lookup_key = 'id' if ids else 'username'
+        found = {row[lookup_key]: row for row in users}
+        data = [found.get(key, {lookup_key: key, 'not_found': True}) for key in ids or usernames]
 
         return api_response(
             success=True,
-            message=_("Following list retrieved successfully"),
-            data=serializer.data
+            message=_("Relationships retrieved successfully"),
+            data=data
         )
 
 
@@ -509,7 +650,7 @@ class UpdateLanguageAPIView(LanguageMixin, UpdateAPIView):
     permission_classes = [IsActiveUser]
 
     def get_object(self):
-        return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         ip = RequestLoggingMiddleware.get_client_ip(request)
@@ -534,3 +675,45 @@ class UpdateLanguageAPIView(LanguageMixin, UpdateAPIView):
             message=_("Language updated successfully"),
             data=serializer.data
         )
+
+
+@extend_schema(tags=['user'])
+class UserExportAPIView(LanguageMixin, APIView):
+    permission_classes = [IsAuthenticated, IsActiveUser]
+    throttle_scope = 'exports'
+
+    def get_throttles(self):
+        # Only starting an export is rate limited; polling its status is free.
+        if self.request.method != 'POST':
+            return []
+        return super().get_throttles()
+
+    def get(self, request):
+        state = export_status(request.user.id)
+        return api_response(
+            success=True,
+            message=_("Export status retrieved successfully"),
+            data=state
+        )
+
+    def post(self, request):
+        ip = RequestLoggingMiddleware.get_client_ip(request)
+        compress = request.data.get('compress', True) not in (False, 'false', '0')
+
+        if not mark_export_queued(request.user.id):
+            return api_response(
+                success=True,
+                message=_("Your export is already being prepared."),
+                data=export_status(request.user.id),
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        export_account.delay(request.user.id, compress)
+        logger.info("Account export requested | user_id=%s | ip=%s", request.user.id, ip)
+
+        return api_response(
+            success=True,
+            message=_("Your export is being prepared. We will email you a download link when it is ready."),
+            data=None,
+            status=status.HTTP_202_ACCEPTED
+        )
@@ -0,0 +1,124 @@
+import logging
+from http import HTTPStatus
+
+from django.http import JsonResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.translation import gettext as _
+from django.views import View
+from redis import RedisError
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.backends import CachedJWTAuthentication
+from authentication.cache import aget_user_snapshot, build_user
+from core.conditional import aget_version, make_etag, finish_conditional
+from core.i18n import resolve_language
+from core.mixins import query_list
+
+logger = logging.getLogger(__name__)
+
+jwt_authentication = CachedJWTAuthentication()
+
+
+def async_api_response(*, success: bool, message: str, data=None, status=HTTPStatus.OK, error_code: str = None):
+    """`api_response` for plain async Django views, producing the same envelope."""
+    response_data = {
+        "success": success,
+        "message": message,
+        "data": data
+    }
+
+    if not success and error_code:
+        response_data["error_code"] = error_code
+
+    return JsonResponse(response_data, status=status)
+
+
+def file_url(field):
+    return field.url if field else None
+
+
+def sparse_fields(data, request):
+    """`SparseFieldsetMixin` pruning for views that build plain dicts without expandable relations."""
+    wanted = query_list(request, 'fields')
+    if wanted is None:
+        return data
+    return {name: value for name, value in data.items() if name in wanted}
+
+
+async def authenticate(request):
+    header = jwt_authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = jwt_authentication.get_validated_token(raw_token)
+    snapshot = await aget_user_snapshot(validated_token[api_settings.USER_ID_CLAIM])
+    if snapshot is None or not snapshot['is_active']:
+        return None
+    return build_user(snapshot)
+
+
+class AsyncAPIView(View):
+    """
+    Base for native async endpoints. Mirrors what the DRF views get from
+    `CachedJWTAuthentication`, `IsAuthenticated`, `IsActiveUser`, `LanguageMixin` and
+    `ConditionalGetMixin` without going through the sync bridge. DRF API exceptions raised
+    by handlers (e.g. serializer validation) are rendered the way DRF renders them.
+    """
+
+    async def aget_validator_parts(self, request, *args, **kwargs):
+        """Async `ConditionalGetMixin.get_validator_parts`: `(parts, kind, obj_id)` or None."""
+        return None
+
+    async def aget_etag(self, request, *args, **kwargs):
+        try:
+            found = await self.aget_validator_parts(request, *args, **kwargs)
+            if found is None:
+                return None
+            parts, kind, obj_id = found
+            version = await aget_version(kind, obj_id)
+        except RedisError:
+            logger.warning("Conditional GET skipped, version store unavailable")
+            return None
+        return make_etag(request, parts, version)
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+
+        try:
+            user = await authenticate(request)
+        except (InvalidToken, TokenError):
+            user = None
+
+        if user is None:
+            return async_api_response(
+                success=False,
+                message=_("Authentication credentials were not provided or are invalid."),
+                status=HTTPStatus.UNAUTHORIZED
+            )
+        if user.is_deleted:
+            return async_api_response(
+                success=False,
+                message=_("Your account is deactivated."),
+                status=HTTPStatus.FORBIDDEN
+            )
+
+        request.user = user
+        translation.activate(resolve_language(request, user))
+
+        etag = await self.aget_etag(request, *args, **kwargs) if request.method == 'GET' else None
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            try:
+                response = await handler(request, *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+                response = JsonResponse(detail, status=exc.status_code, safe=False)
+        return finish_conditional(response, etag)
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+import time
+
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from redis import RedisError
+
+from root.settings import redis, aredis, VERSION_TTL
+
+logger = logging.getLogger(__name__)
+
+
+def version_key(kind, obj_id):
+    return f"version:{kind}:{obj_id}"
+
+
+def bump_version(kind, *obj_ids):
+    """
+    Record that something derived from these objects changed (counters, viewer flags, child lists).
+    Versions expire after VERSION_TTL; an expired version reads as 0, which only changes the ETag once.
+    """
+    now_ms = int(time.time() * 1000)
+    try:
+        with redis.pipeline(transaction=False) as pipe:
+            for obj_id in obj_ids:
+                pipe.set(version_key(kind, obj_id), now_ms, ex=VERSION_TTL)
+            pipe.execute()
+    except RedisError:
+        logger.warning("Version bump failed | kind=%s | ids=%s", kind, obj_ids)
+
+
+async def abump_version(kind, *obj_ids):
+    """`bump_version` for async views, on the asyncio Redis client."""
+    now_ms = int(time.time() * 1000)
+    try:
+        async with aredis.pipeline(transaction=False) as pipe:
+            for obj_id in obj_ids:
+                pipe.set(version_key(kind, obj_id), now_ms, ex=VERSION_TTL)
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Version bump failed | kind=%s | ids=%s", kind, obj_ids)
+
+
+def get_version(kind, obj_id):
+    return int(redis.get(version_key(kind, obj_id)) or 0)
+
+
+async def aget_version(kind, obj_id):
+    return int(await aredis.get(version_key(kind, obj_id)) or 0)
+
+
+def make_etag(request, parts, version):
+    # The same resource renders differently per viewer, per language and per sparse fieldset.
+    parts = (*parts, version, request.user.pk, translation.get_language(),
+             request.GET.get('fields'), request.GET.get('expand'))
+    return '"%s"' % hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def finish_conditional(response, etag):
+    if etag and response.status_code in (200, 304):
+        response['ETag'] = etag
+    patch_vary_headers(response, ('Authorization', 'Accept-Language'))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET with 304 Not Modified before any serialization when the client's
+    If-None-Match validator still matches. Views implement `get_validator_parts`,
+    returning `(parts, kind, obj_id)` or None when the resource cannot be validated
+    cheaply. No Last-Modified is sent: a date cannot tell viewers or languages apart.
+    """
+
+    def get_validator_parts(self, request, *args, **kwargs):
+        return None
+
+    def get_validators(self, request, *args, **kwargs):
+        try:
+            found = self.get_validator_parts(request, *args, **kwargs)
+            if found is None:
+                return None
+            parts, kind, obj_id = found
+            version = get_version(kind, obj_id)
+        except RedisError:
+            logger.warning("Conditional GET skipped, version store unavailable")
+            return None
+        return make_etag(request, parts, version)
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_validators(request, *args, **kwargs)
+
+        response = None
+        if etag:
+            response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return finish_conditional(response, etag)
@@ -22,6 +22,7 @@ class DatabaseConfig:
 @dataclass
 class RedisConfig:
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL")
+    CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "false").lower() == "true"
 
 
 @dataclass
@@ -33,8 +34,9 @@ class BotConfig:
 class EmailConfig:
     EMAIL_USER = os.getenv("EMAIL_USER")
     EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-    EMAIL_HOST = 'smtp.gmail.com'
-    EMAIL_PORT = 587
+    EMAIL_HOST = os.getenv("EMAIL_HOST", 'smtp.gmail.com')
+    EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
 
 
 @dataclass
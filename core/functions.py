@@ -1,6 +1,15 @@
+import logging
 from http import HTTPStatus
 
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from root.settings import STREAMING_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
 
 
 def api_response(*, success: bool, message: str, data=None, status=HTTPStatus.OK, error_code: str = None):
@@ -15,3 +24,45 @@ def api_response(*, success: bool, message: str, data=None, status=HTTPStatus.OK
 
     return Response(response_data, status=status)
 
+
+def streaming_api_response(*, message: str, queryset, serializer, chunk_size: int = STREAMING_CHUNK_SIZE):
+    """
+    Successful list envelope streamed chunk by chunk. The queryset is read with `.iterator()` and
+    each row goes through `serializer.to_representation`, so memory stays flat however many rows
+    there are. `serializer` is an unbound instance carrying the view's context; views are expected
+    to hand over a queryset already shaped by `prepare_queryset`, so rows cost no extra queries.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    head = encoder.encode({"success": True, "message": str(message), "data": []})
+
+    def stream():
+        # Emit everything up to the closing `]}` of the empty envelope, then one fragment per chunk.
+        yield head[:-2]
+        separator = ''
+        rows = []
+        try:
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                rows.append(encoder.encode(serializer.to_representation(instance)))
+                if len(rows) == chunk_size:
+                    yield separator + ','.join(rows)
+                    separator, rows = ',', []
+            if rows:
+                yield separator + ','.join(rows)
+        except Exception:
+            # Headers are already sent; leave the body truncated so clients fail to parse it.
+            logger.exception("Streaming response aborted | model=%s", queryset.model.__name__)
+            return
+        yield head[-2:]
+
+    async def astream():
+        # Under ASGI Django would drain a sync iterator into memory first. Pull each chunk on the
+        # thread-sensitive executor instead, where the ORM cursor lives.
+        chunks = stream()
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+
+    request = serializer.context.get('request')
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return StreamingHttpResponse(astream(), content_type='application/json')
+    return StreamingHttpResponse(stream(), content_type='application/json')
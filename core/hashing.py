@@ -0,0 +1,99 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import make_password, check_password, identify_hasher, get_hasher
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+
+from root.settings import PASSWORD_HASHING_WORKERS, PASSWORD_HASHING_MAX_PENDING, PASSWORD_HASHING_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_HASHING_MAX_PENDING)
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = 503
+    default_detail = _('Service is busy, please try again shortly.')
+    default_code = 'password_hashing_unavailable'
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
+    import django
+    django.setup()
+
+
+def _verify(raw_password, encoded):
+    is_correct = check_password(raw_password, encoded)
+    if not is_correct:
+        return False, False
+
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return True, False
+
+    preferred = get_hasher()
+    must_update = hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+    return True, must_update
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Spawned, not forked: the parent already runs threads (log listener, Redis pools).
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASHING_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+    return _executor
+
+
+def _discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(func, *args):
+    """
+    Run a hashing function in the worker pool, or inline when the pool is disabled.
+    At most PASSWORD_HASHING_MAX_PENDING jobs may be queued at once, so a login storm
+    blocks request threads instead of growing the pool's queue without bound.
+    """
+    if not PASSWORD_HASHING_WORKERS:
+        return func(*args)
+
+    with _pending:
+        executor = get_executor()
+        try:
+            return executor.submit(func, *args).result(timeout=PASSWORD_HASHING_TIMEOUT)
+        except BrokenProcessPool:
+            # A worker died; the next call builds a fresh pool and this one is served inline.
+            logger.error("Password hashing pool broken, rebuilding")
+            _discard_executor(executor)
+            return func(*args)
+        except TimeoutError:
+            logger.warning("Password hashing timed out | timeout=%s", PASSWORD_HASHING_TIMEOUT)
+            raise PasswordHashingUnavailable()
+
+
+def hash_password(raw_password):
+    return _run(make_password, raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """Return `(is_correct, must_update)` for `raw_password` against the stored hash."""
+    return _run(_verify, raw_password, encoded)
@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+from django.utils import translation
+
+from root.settings import LANGUAGES, LANGUAGE_CODE
+
+SUPPORTED_LANGUAGES = frozenset(code for code, _name in LANGUAGES)
+
+
+@lru_cache(maxsize=512)
+def language_from_header(accept_language):
+    """First supported language in an Accept-Language header, or the default."""
+    for part in accept_language.split(','):
+        code = part.split(';', 1)[0].strip().split('-', 1)[0].lower()
+        if code in SUPPORTED_LANGUAGES:
+            return code
+    return LANGUAGE_CODE
+
+
+def resolve_language(request, user=None):
+    """Pick the request language: the user's saved preference wins over Accept-Language."""
+    language = getattr(user, 'language', None) if user is not None and user.is_authenticated else None
+    if language in SUPPORTED_LANGUAGES:
+        return language
+    return language_from_header(request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
+
+
+def preload_catalogs():
+    """Load every supported catalog once per process so the first request in each language doesn't pay for it."""
+    for code in SUPPORTED_LANGUAGES:
+        translation.activate(code)
+    translation.deactivate()
@@ -0,0 +1,171 @@
+import atexit
+import fcntl
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field.
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line, with `extra=` fields merged in."""
+
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, separators=(',', ':'), default=str)
+
+
+def gzip_namer(name):
+    return f"{name}.gz"
+
+
+def gzip_rotator(source, dest):
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class SharedFileMixin:
+    """
+    Lets every process append to the same file. Each write, and the rollover it may trigger,
+    runs under an exclusive `flock` on `<file>.lock`, so there is one writer at a time and
+    rotation is decided on the base name. A process that finds the file was rotated by
+    another one reopens it instead of rotating again.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.lock_file = None
+        self.seen_inode = self.current_inode()
+
+    def current_inode(self):
+        try:
+            return os.stat(self.baseFilename).st_ino
+        except FileNotFoundError:
+            return None
+
+    def rotated_elsewhere(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def emit(self, record):
+        # Opened on use: `logging.shutdown` may close this target before its listener has drained.
+        if self.lock_file is None:
+            self.lock_file = open(f"{self.baseFilename}.lock", 'a')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            if self.current_inode() != self.seen_inode:
+                self.rotated_elsewhere()
+            if self.stream is not None:
+                # Other processes appended since our last write; size checks must see the real end.
+                self.stream.seek(0, os.SEEK_END)
+            super().emit(record)
+            self.seen_inode = self.current_inode()
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class SharedRotatingFileHandler(SharedFileMixin, RotatingFileHandler):
+    pass
+
+
+class SharedTimedRotatingFileHandler(SharedFileMixin, TimedRotatingFileHandler):
+    def rotated_elsewhere(self):
+        super().rotated_elsewhere()
+        # The rollover this process was waiting for has been done by another one.
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+
+class ProcessQueueHandler(QueueHandler):
+    """
+    `QueueHandler` whose listener thread is started lazily in the process that logs.
+    Settings are imported before Celery, gunicorn/uvicorn or the hashing pool fork, and
+    a thread does not survive a fork, so each process starts its own listener (with its
+    own target handler and lock file descriptor, see `make_target`) on its first record.
+    """
+
+    def __init__(self, make_target):
+        super().__init__(None)
+        self.make_target = make_target
+        self.pid = None
+        self.listener = None
+        self.start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self.after_fork)
+
+    def after_fork(self):
+        # The parent's lock may have been held by another thread at fork time.
+        self.start_lock = threading.Lock()
+
+    def start_listener(self):
+        with self.start_lock:
+            pid = os.getpid()
+            if self.pid == pid:
+                return
+            self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, self.make_target())
+            self.listener.start()
+            self.pid = pid
+            atexit.register(self.stop_listener)
+
+    def stop_listener(self):
+        # atexit callbacks are inherited across fork; only the owning process may stop its thread.
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+            self.pid = None
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start_listener()
+        self.queue.put_nowait(record)
+
+    def close(self):
+        self.stop_listener()
+        super().close()
+
+
+def queue_file_handler(filename, max_bytes=0, when=None, backup_count=7):
+    """
+    Logging handler factory for `LOGGING` (`'()': 'core.log.queue_file_handler'`).
+
+    Request threads only format the record and put it on an in-memory queue; a
+    background `QueueListener` thread does the file I/O. All processes write `filename`
+    itself, one at a time (see `SharedFileMixin`). The file rotates by size (`max_bytes`)
+    or time (`when`, as in `TimedRotatingFileHandler`) and rotated files are
+    gzip-compressed, so `backup_count` bounds the files kept however many processes log.
+    """
+
+    def make_target():
+        if when:
+            target = SharedTimedRotatingFileHandler(filename, when=when, backupCount=backup_count, delay=True)
+        else:
+            target = SharedRotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        target.namer = gzip_namer
+        target.rotator = gzip_rotator
+        return target
+
+    return ProcessQueueHandler(make_target)
@@ -1,19 +1,77 @@
 from django.utils import translation
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import ListSerializer
+
+from core.i18n import SUPPORTED_LANGUAGES
 
 
 class LanguageMixin:
     def initial(self, request, *args, **kwargs):
         super().initial(request, *args, **kwargs)
 
-        translation.deactivate()
-
+        # UserLanguageMiddleware already activated the Accept-Language choice; JWT users are
+        # only known after DRF authentication, so apply their saved preference here if it differs.
         if request.user.is_authenticated:
-            user_lang = getattr(request.user, 'language', 'en')
-            translation.activate(user_lang)
-        else:
-            translation.activate('en')
-
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        translation.deactivate()
-        return response
+            user_lang = getattr(request.user, 'language', None)
+            if user_lang in SUPPORTED_LANGUAGES and user_lang != getattr(request, 'LANGUAGE_CODE', None):
+                translation.activate(user_lang)
+                request.LANGUAGE_CODE = user_lang
+
+
+def query_list(request, param):
+    """Comma separated query parameter as a set, or None when the client did not send it."""
+    if request is None:
+        return None
+    raw = request.GET.get(param)
+    if raw is None:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients pick the output fields of a serializer with `?fields=id,image`.
+    Nested relations listed in `Meta.expandable_fields` are rendered as their primary key
+    when picked through `fields`, and as the full nested object when named in `?expand=`.
+    Without `?fields=` the output is unchanged. Pruning happens in `get_fields`, so method
+    fields and nested serializers that were not requested never run.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        wanted = query_list(request, 'fields')
+        if wanted is None or not self.is_root() or hasattr(self, 'initial_data'):
+            return fields
+
+        expand = query_list(request, 'expand') or set()
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            if name in expand:
+                continue
+            if name not in wanted:
+                del fields[name]
+            elif name in expandable:
+                fields[name] = PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+    def is_root(self):
+        # Only the top-level serializer (or the child of a top-level `many=True`) is pruned.
+        parent = self.parent
+        return parent is None or (isinstance(parent, ListSerializer) and parent.parent is None)
+
+    @classmethod
+    def wants(cls, request, name):
+        """Whether `name` will be rendered in full, so views can skip joins and annotations."""
+        wanted = query_list(request, 'fields')
+        if wanted is None:
+            return True
+        if name in getattr(cls.Meta, 'expandable_fields', ()):
+            return name in (query_list(request, 'expand') or ())
+        return name in wanted or name in (query_list(request, 'expand') or ())
+
+    @classmethod
+    def prepare_queryset(cls, queryset, request):
+        """Join only the relations this request will render nested."""
+        related = [name for name in getattr(cls.Meta, 'expandable_fields', ()) if cls.wants(request, name)]
+        return queryset.select_related(*related) if related else queryset
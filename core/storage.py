@@ -49,21 +49,32 @@ class SupabaseStorage(Storage):
         try:
             files = self.client.storage.from_(self.bucket_name).list()
             return any(f['name'] == name for f in files)
-        except:
+        except Exception:
             return False
 
     def url(self, name):
-        """Get public URL for the file"""
+        """Get public URL for the file. Built locally, so it is safe to call from async views."""
         if not name:
             return None
-        return self.client.storage.from_(self.bucket_name).get_public_url(name)
+        return f"{SupabaseConfig.SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{self.bucket_name}/{name}"
 
     def delete(self, name):
-        """Delete file from Supabase Storage"""
-        try:
-            self.client.storage.from_(self.bucket_name).remove([name])
-        except:
-            pass
+        """Delete file from Supabase Storage. Errors propagate so that callers can retry."""
+        self.client.storage.from_(self.bucket_name).remove([name])
+
+    def upload(self, name, path, content_type):
+        """Upload a local file under an exact name, streaming it from disk instead of reading it into memory."""
+        self.client.storage.from_(self.bucket_name).upload(
+            name,
+            path,
+            file_options={"content-type": content_type, "upsert": "true"}
+        )
+        return name
+
+    def signed_url(self, name, expires_in):
+        """Get a temporary URL for a file that must not be publicly listed"""
+        result = self.client.storage.from_(self.bucket_name).create_signed_url(name, expires_in)
+        return result.get('signedURL') or result.get('signedUrl')
 
     def size(self, name):
         """Get file size"""
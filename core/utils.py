@@ -1,41 +1,59 @@
 import logging
+import random
+import time
 
 from django.utils.deprecation import MiddlewareMixin
 
+from root.settings import REQUEST_LOG_SAMPLING, REQUEST_LOG_SLOW_MS
+
 requests_logger = logging.getLogger("requests_logger")
 
+# Longest prefixes first so the most specific sampling rule wins.
+SAMPLING_RULES = sorted(REQUEST_LOG_SAMPLING.items(), key=lambda rule: len(rule[0]), reverse=True)
+
+
+def sample_rate(path):
+    for prefix, rate in SAMPLING_RULES:
+        if path.startswith(prefix):
+            return rate
+    return 1.0
+
 
 class RequestLoggingMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        ip = self.get_client_ip(request)
-        request._log_client_ip = ip
-        requests_logger.info(
-            f"Request received: {request.method} {request.get_full_path()}",
-            extra={
-                "client_ip": ip,
-                "method": request.method,
-                "path": request.get_full_path(),
-            }
-        )
+        request._log_client_ip = self.get_client_ip(request)
+        request._log_started = time.perf_counter()
 
     def process_response(self, request, response):
-        ip = getattr(request, "_log_client_ip", "unknown")
+        duration_ms = round((time.perf_counter() - getattr(request, "_log_started", time.perf_counter())) * 1000, 1)
+
+        if (
+                response.status_code < 500
+                and duration_ms < REQUEST_LOG_SLOW_MS
+                and random.random() >= sample_rate(request.path)
+        ):
+            return response
+
         requests_logger.info(
-            f"Response sent: status={response.status_code}",
+            "%s %s %s",
+            request.method,
+            request.path,
+            response.status_code,
             extra={
-                "client_ip": ip,
+                "client_ip": getattr(request, "_log_client_ip", "unknown"),
                 "method": request.method,
                 "path": request.get_full_path(),
+                "status": response.status_code,
+                "duration_ms": duration_ms,
             }
         )
         return response
 
     def process_exception(self, request, exception):
-        ip = getattr(request, "_log_client_ip", "unknown")
         requests_logger.error(
             f"Exception occurred: {str(exception)}",
             extra={
-                "client_ip": ip,
+                "client_ip": getattr(request, "_log_client_ip", "unknown"),
                 "method": request.method,
                 "path": request.get_full_path(),
             }
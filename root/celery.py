@@ -1,6 +1,8 @@
+import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
 
@@ -9,3 +11,9 @@ app = Celery('root')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def flush_logs(**kwargs):
+    # Prefork children leave through os._exit, which skips atexit; drain the log queues here.
+    logging.shutdown()
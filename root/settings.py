@@ -5,6 +5,7 @@ from pathlib import Path
 
 from django.utils.translation import gettext_lazy as _
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
 from core.config import RedisConfig, EmailConfig, SecretConfig
 
@@ -77,6 +78,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.PooledPasswordBackend',
+]
+
+# Password hashing runs in a process pool of this size; 0 hashes inline on the request thread.
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_PENDING = 64
+PASSWORD_HASHING_TIMEOUT = 10
+
 USE_I18N = True
 USE_L10N = True
 USE_TZ = True
@@ -86,7 +96,7 @@ LANGUAGE_CODE = 'en'
 LANGUAGES = [
     ('en', _('English')),
     ('uz', _('Uzbek')),
-    ('en', _('Russian')),
+    ('ru', _('Russian')),
 ]
 
 TIME_ZONE = 'Asia/Tashkent'
@@ -104,7 +114,6 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'authentication.middleware.UserLanguageMiddleware',
-    'django.middleware.locale.LocaleMiddleware',
     'core.utils.RequestLoggingMiddleware'
 ]
 
@@ -121,8 +130,23 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserScopedRateThrottle',
+    ],
+    # Reverse proxies in front of the app; throttles trust only the X-Forwarded-For entries they add.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'likes': '60/min',
+        'follows': '30/min',
+        'comments': '20/min',
+        'register': '5/hour',
+        'verify': '10/min',
+        'login': '10/min',
+        'availability': '60/min',
+        'exports': '3/day',
+    },
 }
 
 SPECTACULAR_SETTINGS = {
@@ -134,7 +158,8 @@ SPECTACULAR_SETTINGS = {
 }
 
 SIMPLE_JWT = {
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is buffered in Redis and flushed by `authentication.tasks.flush_last_logins`.
+    "UPDATE_LAST_LOGIN": False,
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
 }
@@ -142,15 +167,63 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = 'authentication.User'
 
 redis = Redis.from_url(RedisConfig.CELERY_BROKER_URL, decode_responses=True)
+aredis = AsyncRedis.from_url(RedisConfig.CELERY_BROKER_URL, decode_responses=True)
+
+USER_CACHE_TTL = 60 * 15
+USER_CACHE_LOCAL_TTL = 5
+USER_CACHE_LOCAL_MAXSIZE = 10_000
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = EmailConfig.EMAIL_HOST
+EMAIL_PORT = EmailConfig.EMAIL_PORT
+EMAIL_USE_TLS = EmailConfig.EMAIL_USE_TLS
 EMAIL_HOST_USER = EmailConfig.EMAIL_USER
 EMAIL_HOST_PASSWORD = EmailConfig.EMAIL_PASSWORD
 
-CELERY_TASK_ALWAYS_EAGER = True
+EMAIL_OUTBOX_KEY = 'email:outbox'
+EMAIL_BATCH_SIZE = 50
+
+LAST_LOGIN_KEY = 'users:last_login'
+
+VERIFICATION_CODE_TTL = 300
+VERIFICATION_RESEND_COOLDOWN = 60
+VERIFICATION_MAX_ATTEMPTS = 5
+
+AVAILABILITY_BLOOM_CAPACITY = 1_000_000
+AVAILABILITY_BLOOM_ERROR_RATE = 0.01
+
+SEARCH_INDEX_KEY = 'users:search'
+SEARCH_CANDIDATES = 200
+
+SUGGESTIONS_TOP_K = 50
+SUGGESTIONS_TTL = 60 * 60 * 24
+SUGGESTIONS_REFRESH_BATCH = 500
+
+FOLLOW_GRAPH_TTL = 60 * 60 * 24
+
+# Conditional GET version stamps; an expired stamp just changes the ETag once.
+VERSION_TTL = 60 * 60 * 24 * 30
+
+BULK_LOOKUP_MAX = 100
+
+# Unseen-post badges stop counting here and report `has_more` instead.
+FEED_UNSEEN_CAP = 100
+
+# Rows fetched per server-side cursor round trip by streamed list responses.
+STREAMING_CHUNK_SIZE = 500
+
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_COMPRESS_LEVEL = 5
+EXPORT_URL_TTL = 60 * 60 * 24 * 7
+EXPORT_LOCK_TTL = 60 * 60 * 6
+
+POST_DELETE_CHUNK_SIZE = 1000
+
+ACCOUNT_PURGE_AFTER_DAYS = 30
+ACCOUNT_PURGE_CHUNK_SIZE = 1000
+ACCOUNT_PURGE_BATCH = 20
+
+CELERY_TASK_ALWAYS_EAGER = RedisConfig.CELERY_TASK_ALWAYS_EAGER
 
 CELERY_BROKER_URL = RedisConfig.CELERY_BROKER_URL
 
@@ -161,9 +234,50 @@ CELERY_TASK_SERIALIZER = 'json'
 
 CELERY_TIMEZONE = 'Asia/Tashkent'
 
+CELERY_TASK_ROUTES = {
+    'authentication.tasks.flush_email_outbox': {'queue': 'email'},
+    'authentication.tasks.export_account': {'queue': 'exports'},
+    'authentication.tasks.send_export_email': {'queue': 'email'},
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-last-logins': {
+        'task': 'authentication.tasks.flush_last_logins',
+        'schedule': 60.0,
+    },
+    'refresh-suggestions': {
+        'task': 'authentication.tasks.refresh_dirty_suggestions',
+        'schedule': 300.0,
+    },
+    'check-follow-graph': {
+        'task': 'authentication.tasks.check_follow_graph',
+        'schedule': 600.0,
+    },
+    'purge-deleted-accounts': {
+        'task': 'authentication.tasks.purge_deleted_accounts',
+        'schedule': 60.0 * 60,
+    },
+    'purge-stale-tombstones': {
+        'task': 'app.tasks.purge_stale_tombstones',
+        'schedule': 60.0 * 15,
+    },
+}
+
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Set LOG_LEVEL=INFO (or higher) in production so DEBUG records are dropped before they are formatted.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO")
+
+# Fraction of successful requests written to requests.log, by longest matching path prefix.
+# Errors and slow requests are always logged.
+REQUEST_LOG_SAMPLING = {
+    '/api/v1/home/': 0.1,
+    '/api/v1/posts/': 0.25,
+    '/static/': 0.0,
+}
+REQUEST_LOG_SLOW_MS = 1000
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -172,23 +286,24 @@ LOGGING = {
             "format": "[{levelname}] {asctime} | {name} | {message}",
             "style": "{",
         },
-        "request": {
-            "format": "[{levelname}] {asctime} | {client_ip} | {method} {path} | {message}",
-            "style": "{",
+        "json": {
+            "()": "core.log.JsonFormatter",
         },
     },
     "handlers": {
-        "file_debug": {
-            "level": "DEBUG",
-            "class": "logging.FileHandler",
-            "filename": os.path.join(LOG_DIR, "debug.log"),
-            "formatter": "verbose",
+        "file_app": {
+            "()": "core.log.queue_file_handler",
+            "filename": os.path.join(LOG_DIR, "app.log"),
+            "max_bytes": 50 * 1024 * 1024,
+            "backup_count": 10,
+            "formatter": "json",
         },
         "file_requests": {
-            "level": "INFO",
-            "class": "logging.FileHandler",
+            "()": "core.log.queue_file_handler",
             "filename": os.path.join(LOG_DIR, "requests.log"),
-            "formatter": "request",
+            "when": "midnight",
+            "backup_count": 14,
+            "formatter": "json",
         },
         "console": {
             "class": "logging.StreamHandler",
@@ -197,9 +312,27 @@ LOGGING = {
     },
     "loggers": {
         "django": {
-            "handlers": ["console", "file_debug"],
-            "level": "DEBUG",
-            "propagate": True,
+            "handlers": ["console", "file_app"] if DEBUG else ["file_app"],
+            "level": LOG_LEVEL,
+            "propagate": False,
+        },
+        "django.db.backends": {
+            "level": "INFO",
+        },
+        "authentication": {
+            "handlers": ["file_app"],
+            "level": LOG_LEVEL,
+            "propagate": False,
+        },
+        "app": {
+            "handlers": ["file_app"],
+            "level": LOG_LEVEL,
+            "propagate": False,
+        },
+        "core": {
+            "handlers": ["file_app"],
+            "level": LOG_LEVEL,
+            "propagate": False,
         },
         "requests_logger": {
             "handlers": ["file_requests"],